@@ -8,15 +8,34 @@ COMPLETATO: Database prodotti reali ABB/Siemens + Metodi mancanti
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import math
+import bisect
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import cm
+from types import MappingProxyType
+from typing import NamedTuple, Optional
 from datetime import datetime
 
+# Etichette statiche delle tabelle di visualizzazione (costruite una sola volta)
+_PARAMETRI_CORRENTE_GUASTO = ("Corrente CEI 11-1", "Corrente effettiva", "Metodo calcolo", "Tempo eliminazione")
+_PARAMETRI_DISPERSORE = ("Dimensioni cabina", "Anello perimetrale", "N° picchetti", "Resistenza totale")
+_VERIFICHE_SICUREZZA = ("Resistenza terra", "Tensione passo", "Tensione contatto", "Tensione terra")
+_CONDUTTORI_TERRA = ("Anello principale", "PE principale", "PE masse")
+_SOLUZIONI_ECONOMICHE = ("Ucc 8% + BT Sel", "87T Digitale", "Solo BT Sel")
+_GIUDIZI_ECONOMICI = ("🏆 PRIMA SCELTA", "Casi speciali", "Budget limitato")
+_PARAMETRI_PRESTAZIONI = ("Trasformatore", "Selettività attesa", "Affidabilità", "Manutenzione", "Vita utile")
+
+# Resistività del terreno selezionabili (Ω⋅m) con la relativa descrizione
+_DESCRIZIONI_TERRENO = MappingProxyType({
+    30: "Terreno umido/argilloso",
+    50: "Terreno misto umido",
+    70: "Terreno normale trattato",
+    100: "Terreno medio standard",
+    150: "Terreno asciutto/sabbioso",
+    200: "Terreno difficile",
+    300: "Terreno roccioso/arido"
+})
+
 # CSS personalizzato per pulsante AZZERA rosso
 st.markdown("""
 <style>
@@ -45,125 +64,507 @@ st.set_page_config(page_title="Calcolatore Cabina MT/BT - Maurizio v3.0",
                    layout="wide",
                    initial_sidebar_state="expanded")
 
-class CabinaMTBT:
+# Tabelle tecniche di riferimento: costanti di modulo in sola lettura, costruite una sola volta
 
-    def __init__(self):
-        # Potenze normalizzate CEI 14-52 (kVA)
-        self.potenze_normalizzate = [
-            25, 50, 100, 160, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600,
-            2000, 2500, 3150
-        ]
+# Costanti elettriche ricorrenti
+_SQRT3 = 1.7320508075688772           # math.sqrt(3)
+_SIN_PHI_085 = 0.526782687642637      # sqrt(1 - 0.85**2), cos φ di progetto dei cavi
 
-        # Perdite a vuoto Po (W) - categoria AAo
-        self.perdite_vuoto = {
-            25: 63, 50: 81, 100: 130, 160: 189, 250: 270, 315: 324, 400: 387,
-            500: 459, 630: 540, 800: 585, 1000: 693, 1250: 855, 1600: 1080,
-            2000: 1305, 2500: 1575, 3150: 1980
-        }
+# Potenze normalizzate CEI 14-52 (kVA)
+_POTENZE_NORMALIZZATE = (
+    25, 50, 100, 160, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600,
+    2000, 2500, 3150
+)
+_POTENZE_ARRAY = np.array(_POTENZE_NORMALIZZATE)
+_POTENZE_ARRAY.flags.writeable = False
+
+# Perdite a vuoto Po (W) - categoria AAo
+_PERDITE_VUOTO = MappingProxyType({
+    25: 63, 50: 81, 100: 130, 160: 189, 250: 270, 315: 324, 400: 387,
+    500: 459, 630: 540, 800: 585, 1000: 693, 1250: 855, 1600: 1080,
+    2000: 1305, 2500: 1575, 3150: 1980
+})
+
+# Perdite a carico Pk (W) - categoria Bk
+_PERDITE_CARICO = MappingProxyType({
+    25: 725, 50: 875, 100: 1475, 160: 2000, 250: 2750, 315: 3250, 400: 3850,
+    500: 4600, 630: 5400, 800: 7000, 1000: 9000, 1250: 11000, 1600: 14000,
+    2000: 18000, 2500: 22000, 3150: 27500
+})
+
+# Perdite a vuoto e a carico in kW per taglia, lette insieme da ventilazione e rendimento
+_PERDITE_KW = MappingProxyType({
+    p: (_PERDITE_VUOTO[p] / 1000, _PERDITE_CARICO[p] / 1000) for p in _PERDITE_VUOTO
+})
+
+# 🔧 AGGIORNAMENTO: Tensione di cortocircuito Ucc% = 8% per TUTTI i trasformatori
+# Secondo raccomandazioni ingegneristiche per migliore selettività passiva
+_UCC_PERC = 8
+_UCC = MappingProxyType(dict.fromkeys(_POTENZE_NORMALIZZATE, _UCC_PERC))
+# Ucc in per unità, già valutata per ogni taglia (usata nel calcolo dell'impedenza)
+_UCC_PU = MappingProxyType({p: ucc / 100 for p, ucc in _UCC.items()})
+# Stessi valori allineati a _POTENZE_ARRAY, per i calcoli su array di taglie
+_UCC_PU_ARRAY = np.array([_UCC_PU[p] for p in _POTENZE_NORMALIZZATE])
+_UCC_PU_ARRAY.flags.writeable = False
+
+# Volume olio trasformatore (litri) per la verifica antincendio
+_VOLUMI_OLIO = MappingProxyType({
+    25: 50, 50: 80, 100: 150, 160: 220, 250: 350, 315: 420, 400: 520,
+    500: 650, 630: 800, 800: 1000, 1000: 1200, 1250: 1500, 1600: 1900,
+    2000: 2300, 2500: 2800, 3150: 3400
+})
+
+# Prescrizioni antincendio oltre la soglia di 1 m³ di olio (prima e dopo la vasca di
+# raccolta, dimensionata sul volume) e sotto soglia
+_PRESCRIZIONI_IMPIANTI_ANTINCENDIO = (
+    "Sistema rivelazione fumo/fiamma automatico",
+    "Sistema spegnimento automatico (CO₂ o polvere)"
+)
+_PRESCRIZIONI_LOCALE_ANTINCENDIO = (
+    "Separazione REI 120 da altri locali",
+    "Ventilazione meccanica forzata",
+    "Segnalazioni allarme in locale presidiato"
+)
+_PRESCRIZIONI_SENZA_ANTINCENDIO = (
+    "Solo estintori portatili",
+    "Ventilazione naturale sufficiente",
+    "Controllo periodico perdite olio"
+)
 
-        # Perdite a carico Pk (W) - categoria Bk
-        self.perdite_carico = {
-            25: 725, 50: 875, 100: 1475, 160: 2000, 250: 2750, 315: 3250, 400: 3850,
-            500: 4600, 630: 5400, 800: 7000, 1000: 9000, 1250: 11000, 1600: 14000,
-            2000: 18000, 2500: 22000, 3150: 27500
-        }
+# Database cavi con R, X reali (Ω/km)
+_CAVI_MT_PRO = MappingProxyType({
+    35: {"R": 0.868, "X": 0.115, "portata_base": 140},
+    50: {"R": 0.641, "X": 0.110, "portata_base": 170},
+    70: {"R": 0.443, "X": 0.105, "portata_base": 210},
+    95: {"R": 0.320, "X": 0.100, "portata_base": 250},
+    120: {"R": 0.253, "X": 0.095, "portata_base": 285},
+    150: {"R": 0.206, "X": 0.090, "portata_base": 320},
+    185: {"R": 0.164, "X": 0.085, "portata_base": 370},
+    240: {"R": 0.125, "X": 0.080, "portata_base": 430},
+    300: {"R": 0.100, "X": 0.075, "portata_base": 490},
+    400: {"R": 0.075, "X": 0.070, "portata_base": 570},
+    500: {"R": 0.060, "X": 0.065, "portata_base": 650}
+})
+
+_CAVI_BT_PRO = MappingProxyType({
+    35: {"R": 0.641, "X": 0.065, "portata_base": 138},
+    50: {"R": 0.443, "X": 0.060, "portata_base": 168},
+    70: {"R": 0.320, "X": 0.060, "portata_base": 207},
+    95: {"R": 0.236, "X": 0.055, "portata_base": 252},
+    120: {"R": 0.188, "X": 0.055, "portata_base": 290},
+    150: {"R": 0.150, "X": 0.050, "portata_base": 330},
+    185: {"R": 0.123, "X": 0.050, "portata_base": 375},
+    240: {"R": 0.094, "X": 0.045, "portata_base": 435},
+    300: {"R": 0.075, "X": 0.045, "portata_base": 495},
+    400: {"R": 0.057, "X": 0.040, "portata_base": 695},
+    500: {"R": 0.045, "X": 0.040, "portata_base": 800},
+    630: {"R": 0.036, "X": 0.035, "portata_base": 1200}
+})
+
+# Fattori di correzione portata cavi: temperatura (°C) e n° cavi raggruppati interpolati
+# linearmente tra i punti tabellati (valori estremi fuori intervallo), posa per categoria
+_K_TEMP_T = np.array([30, 35, 40, 45, 50], dtype=float)
+_K_TEMP_K = np.array([1.0, 0.96, 0.91, 0.85, 0.78])
+_K_RAGGR_N = np.array([1, 2, 3, 4, 6, 9], dtype=float)
+_K_RAGGR_K = np.array([1.0, 0.85, 0.75, 0.70, 0.60, 0.55])
+_K_POSA = MappingProxyType({"aria": 1.0, "cavidotto": 0.85, "interrato": 0.80, "passerella": 0.95})
+
+# Costanti termiche K (A√s/mm², IEC 60364-5-54) e √t dei tempi di eliminazione guasto usati
+_K_TERMICHE = MappingProxyType({
+    "BT": 115,  # A√s/mm² per cavi BT rame/XLPE
+    "MT": 142   # A√s/mm² per cavi MT rame/XLPE
+})
+_RADICE_T_ELIMINAZIONE = MappingProxyType({t: math.sqrt(t) for t in (0.01, 0.1, 0.5)})
+
+# Impianto di terra: costanti geometriche e picchetto standard (lunghezza e diametro in m)
+_DUE_PI = 2 * math.pi
+_QUATTRO_PI = 4 * math.pi
+_INV_PI = 1 / math.pi
+_LUNGHEZZA_PICCHETTO = 3.0
+_DIAMETRO_PICCHETTO = 0.02
+_LOG_PICCHETTO = math.log(4 * _LUNGHEZZA_PICCHETTO / _DIAMETRO_PICCHETTO)
+# Resistenza per unità di resistività (1/m): picchetto singolo ln(4L/d)/(2πL) e
+# coppia minima di picchetti 1/(4πL)
+_R_PICCHETTO_UNITARIA = _LOG_PICCHETTO / (_DUE_PI * _LUNGHEZZA_PICCHETTO)
+_R_PICCHETTI_MIN_UNITARIA = 1 / (_QUATTRO_PI * _LUNGHEZZA_PICCHETTO)
+# Tensioni di sicurezza: passo di 0.8 m sul gradiente ρ·If/(2π·A), riduzione 0.3 sul contatto
+_K_PASSO = 0.8 / _DUE_PI
+_K_CONTATTO = 0.3
+
+# Illuminamento richiesto per tipo di ambiente e apparecchi LED (potenza W, flusso lm, costo €)
+_PARAMETRI_AMBIENTI = MappingProxyType({
+    "Cabina MT/BT": {"E_richiesto": 200, "descrizione": "Manutenzione generale"},
+    "Locale Quadri": {"E_richiesto": 500, "descrizione": "Lavori di precisione"},
+    "Corridoio": {"E_richiesto": 100, "descrizione": "Passaggio"},
+    "Deposito": {"E_richiesto": 150, "descrizione": "Magazzino"}
+})
+
+_APPARECCHI_LED = MappingProxyType({
+    "36W Standard": {"potenza": 36, "flusso": 4000, "costo": 65},
+    "54W Industriale": {"potenza": 54, "flusso": 6500, "costo": 125},
+    "24W Economy": {"potenza": 24, "flusso": 2800, "costo": 45}
+})
+
+# Taglie interruttori e rapporti TA normalizzati (ordinati, per la ricerca con bisect)
+_TAGLIE_INT_MT = (630, 1250, 1600, 2000, 2500, 3150)
+_TAGLIE_INT_BT = (160, 250, 400, 630, 800, 1000, 1250, 1600, 2000, 2500, 3200)
+_RAPPORTI_TA = (5, 10, 15, 20, 25, 30, 40, 50, 60, 75, 100)
+_RAPPORTI_TA_STD = _RAPPORTI_TA + (150, 200)
+
+# Potere di interruzione BT (kA) per fascia di Icc (A), soglie ridotte grazie a Ucc 8%
+_SOGLIE_ICC_PDI = (20000, 30000)
+_PDI_BT_KA = (25, 35, 50)
+
+# Classificazione impianto per fascia di potenza (kVA): (categoria, criticità, complessità)
+_SOGLIE_CATEGORIA = (400, 1000)
+_CLASSI_IMPIANTO = (
+    ("PICCOLA", "BASSA", "SEMPLICE"),
+    ("MEDIA", "MEDIA", "STANDARD"),
+    ("GRANDE", "ALTA", "COMPLESSA")
+)
 
-        # 🔧 AGGIORNAMENTO: Tensione di cortocircuito Ucc% = 8% per TUTTI i trasformatori
-        # Secondo raccomandazioni ingegneristiche per migliore selettività passiva
-        self.ucc = {p: 8 for p in self.potenze_normalizzate}
 
+def _colonna_cavi(tabella, campo=None):
+    """Colonna della tabella cavi come array NumPy in sola lettura (sezioni se campo è None)"""
+    if campo is None:
+        colonna = np.array(list(tabella))
+    else:
+        colonna = np.array([dati[campo] for dati in tabella.values()], dtype=float)
+    colonna.flags.writeable = False
+    return colonna
+
+
+# Tabelle cavi in forma vettoriale (una colonna per grandezza) per la selezione con NumPy
+_SEZIONI_MT = _colonna_cavi(_CAVI_MT_PRO)
+_R_MT = _colonna_cavi(_CAVI_MT_PRO, "R")
+_X_MT = _colonna_cavi(_CAVI_MT_PRO, "X")
+_PORTATE_BASE_MT = _colonna_cavi(_CAVI_MT_PRO, "portata_base")
+_SEZIONI_BT = _colonna_cavi(_CAVI_BT_PRO)
+_R_BT = _colonna_cavi(_CAVI_BT_PRO, "R")
+_X_BT = _colonna_cavi(_CAVI_BT_PRO, "X")
+_PORTATE_BASE_BT = _colonna_cavi(_CAVI_BT_PRO, "portata_base")
+
+
+def _cos_sin_phi(cos_phi):
+    """Coppia (cos φ, sin φ), scalari o array"""
+    if np.ndim(cos_phi):
+        cos_phi = np.asarray(cos_phi, dtype=np.float64)
+        return cos_phi, np.sqrt(1 - cos_phi**2)
+    return cos_phi, math.sqrt(1 - cos_phi**2)
+
+
+def _caduta_tensione_perc(I, R_tot, X_tot, V, cos_phi=0.85, sin_phi=_SIN_PHI_085):
+    """Caduta di tensione percentuale trifase ΔV% = √3·I·(R·cos φ + X·sin φ)·100 / V (scalari o array)"""
+    return (_SQRT3 * I * (R_tot * cos_phi + X_tot * sin_phi) * 100) / V
+
+
+def _sezioni_pe(sezione):
+    """
+    Conduttori equipotenziali (PE principale, PE masse) dalla sezione del dispersore:
+    uguale fino a 16 mm², 16 mm² fino a 35 mm², poi metà; masse metà del principale, min 6 mm².
+    Accetta scalari o array (un dispersore per ramo).
+    """
+    if np.ndim(sezione):
+        sezione = np.asarray(sezione, dtype=np.float64)
+        pe_principale = np.select([sezione <= 16, sezione <= 35], [sezione, 16], default=sezione / 2)
+        return pe_principale, np.maximum(6, pe_principale / 2)
+    if sezione <= 16:
+        pe_principale = sezione
+    elif sezione <= 35:
+        pe_principale = 16
+    else:
+        pe_principale = sezione / 2
+    return pe_principale, max(6, pe_principale / 2)
+
+
+def _indice_cavo(R, X, portate_base, kcorr, L_km, I, I_progetto, V, dV_max):
+    """
+    Nucleo numerico della selezione cavi: portata corretta e caduta di tensione
+    (cos φ = 0.85) di tutte le sezioni in un solo passaggio vettoriale.
+    Restituisce l'indice della prima sezione che soddisfa entrambe le verifiche
+    (-1 se nessuna) insieme agli array di portata, resistenza totale e caduta.
+    """
+    I_amm = portate_base * kcorr
+    R_tot = R * L_km
+    dV = _caduta_tensione_perc(I, R_tot, X * L_km, V)
+    idonei = (I_amm >= I_progetto) & (dV <= dV_max)
+    i = int(np.argmax(idonei)) if idonei.any() else -1
+    return i, I_amm, R_tot, dV
+
+
+@st.cache_resource(show_spinner=False)
+def init_tipi_risultato():
+    """
+    Tipi dei risultati di calcolo, creati una sola volta per processo: st.cache_data li
+    serializza con pickle, che richiede la stessa classe __main__.<nome> a ogni rerun
+    """
+    class CavoSelezionato(NamedTuple):
+        """Cavo scelto per un lato (MT o BT); verifiche True/False, None = al limite"""
+        sezione: int
+        portata_corretta: float
+        caduta_tensione_perc: float
+        perdite_kw: float
+        R_ohm_km: Optional[float] = None
+        X_ohm_km: Optional[float] = None
+        verifica_portata: Optional[bool] = True
+        verifica_caduta: Optional[bool] = True
+
+    class SezioniCavi(NamedTuple):
+        """Risultato del dimensionamento cavi MT/BT"""
+        mt: CavoSelezionato
+        bt: CavoSelezionato
+
+    class ImpiantoTerra(NamedTuple):
+        """Risultato del calcolo impianto di terra CEI 11-1; _asdict() per l'esportazione"""
+        # Parametri calcolo
+        resistivita_terreno: float
+        lunghezza_linea_aerea_km: float
+        lunghezza_linea_cavo_km: float
+        tensione_rete_kv: float
+        # Corrente di guasto
+        corrente_guasto_cei: float
+        corrente_guasto_effettiva: float
+        metodo_calcolo: str
+        # Dimensioni cabina
+        dimensioni_cabina: str
+        area_cabina: float
+        perimetro: float
+        # Dispersore
+        sezione_anello: int
+        resistenza_anello: float
+        n_picchetti: int
+        lunghezza_picchetti: float
+        resistenza_picchetti: float
+        resistenza_totale: float
+        # Tensioni di sicurezza
+        tensione_terra: float
+        tensione_passo_effettiva: float
+        tensione_contatto_effettiva: float
+        # Verifiche
+        verifica_resistenza: str
+        verifica_passo: str
+        verifica_contatto: str
+        # Conduttori equipotenziali
+        sezione_pe_principale: float
+        sezione_pe_masse: float
+        protezione_catodica_richiesta: bool
+        # Note tecniche
+        note: tuple
+
+    for tipo in (CavoSelezionato, SezioniCavi, ImpiantoTerra):
+        tipo.__qualname__ = tipo.__name__
+    return CavoSelezionato, SezioniCavi, ImpiantoTerra
+
+
+CavoSelezionato, SezioniCavi, ImpiantoTerra = init_tipi_risultato()
+
+
+def _seleziona_cavo(sezioni, R, X, portate_base, kcorr, L_km, I, I_progetto, V, dV_max):
+    """Cavo selezionato dal nucleo vettoriale, None se nessuna sezione è idonea"""
+    i, I_amm, R_tot, dV = _indice_cavo(R, X, portate_base, kcorr, L_km, I, I_progetto, V, dV_max)
+    if i < 0:
+        return None
+    return CavoSelezionato(
+        sezione=int(sezioni[i]),
+        portata_corretta=float(I_amm[i]),
+        caduta_tensione_perc=float(dV[i]),
+        perdite_kw=3 * (I**2) * float(R_tot[i]) / 1000,
+        R_ohm_km=float(R[i]),
+        X_ohm_km=float(X[i])
+    )
+
+# ===== CURVE DI INTERVENTO PER LA VERIFICA DI SELETTIVITÀ UCC 8% =====
+
+def _tempo_rele_51_mt_ucc8(corrente, I_rele_51, TMS):
+    """
+    Curva NORMALE INVERSE ottimizzata per Ucc 8%
+    """
+    if corrente < I_rele_51:
+        return float('inf')
+
+    rapporto = corrente / I_rele_51
+    if rapporto <= 1.0:
+        return float('inf')
+
+    # Formula IEC Normal Inverse ottimizzata
+    tempo_base = TMS * (13.5 / (rapporto - 1))
+
+    # Limiti ottimizzati per Ucc 8%
+    tempo_base = max(tempo_base, 0.08)  # Era 0.1, ora 0.08
+    tempo_base = min(tempo_base, 80.0)   # Era 100, ora 80
+
+    return round(tempo_base, 3)
+
+
+def _tempo_rele_50_mt_ucc8(corrente, I_rele_50, ritardo_50):
+    """Relè 50 MT ottimizzato per Ucc 8%"""
+    if corrente >= I_rele_50:
+        return ritardo_50
+    else:
+        return float('inf')
+
+
+def _tempo_interruttore_bt_ucc8(corrente, I_int_bt, K_mag=8, K_term=1.25):
+    """
+    Curve magnetotermiche CORRETTE per coordinamento con Ucc 8%
+    AGGIORNAMENTO: Curve più aggressive per migliore coordinamento
+    """
+    I_mag_bt = I_int_bt * K_mag      # Ridotto a 8 per intervento più veloce
+    I_term_bt = I_int_bt * K_term    # Ridotto a 1.25 per soglia più bassa
+
+    if corrente >= I_mag_bt:
+        return 0.005  # Magnetico istantaneo più veloce
+    elif corrente >= I_term_bt:
+        rapporto = corrente / I_int_bt
+
+        # Curve termiche AGGRESSIVE per coordinamento selettivo
+        if rapporto >= 25:       # Soglia ridotta
+            return 0.010         # Molto veloce per CC alti
+        elif rapporto >= 15:     # Soglia ridotta
+            return 0.020         # Veloce per CC medi
+        elif rapporto >= 8:      # Soglia ridotta
+            return 0.050         # Più veloce per sovraccarichi alti
+        elif rapporto >= 4:      # Soglia ridotta
+            return 0.150         # Più veloce per sovraccarichi medi
+        elif rapporto >= 2.0:    # Soglia ridotta
+            return 1.0           # Drasticamente ridotto da 18s a 1s
+        else:
+            # Formula termica più aggressiva
+            return min(200 / (rapporto**1.5), 200)  # Molto più veloce
+    else:
+        return float('inf')
+
+
+def _tempi_intervento_ucc8(correnti, I_int_bt, I_rele_51, I_rele_50, TMS_51, ritardo_50, rapporto_tensioni):
+    """
+    Tempi di intervento (s) per ogni corrente di prova lato BT: array n×3 con colonne
+    interruttore BT, relè 51 MT e relè 50 MT (inf se la protezione non interviene)
+    """
+    tempi = np.empty((len(correnti), 3))
+    for i, I_test in enumerate(correnti):
+        I_test_mt = I_test * rapporto_tensioni
+        tempi[i] = (
+            _tempo_interruttore_bt_ucc8(I_test, I_int_bt),
+            _tempo_rele_51_mt_ucc8(I_test_mt, I_rele_51, TMS_51),
+            _tempo_rele_50_mt_ucc8(I_test_mt, I_rele_50, ritardo_50)
+        )
+    return tempi
+
+
+# Esiti di selettività indicizzati dal codice di intervento (BT << 1 | MT): 0 nessuna
+# protezione, 1 solo MT, 2 solo BT; con entrambe (3) l'esito dipende dal margine (3, 4, 5)
+_ESITI_SELETTIVITA = ("✅ OK", "⚠️ SOLO MT", "✅ PERFETTO", "✅ OK", "⚠️ LIMITE", "❌ NO")
+_MARGINI_SENZA_CONFRONTO = ("N/A", "N/A", "∞")
+_ESITO_NO = 5
+_PROTEZIONI_MT_ATTIVE = ("50 (istantaneo)", "51 (temporizzato)", "Nessuna")
+
+# 🆕 DATABASE PRODUTTORI REALI CERTIFICATI - AGGIORNATO CON DATI FORNITI
+_INTERRUTTORI_ABB = MappingProxyType({
+    # ABB TMAX - Dati reali da catalogo ufficiale AGGIORNATI
+    160: {"modello": "Tmax T1C 160", "pdi_415v": 36000, "curve_tipo": "Standard", "Im_10": 1600, "Im_5": 800},
+    250: {"modello": "Tmax T2N 250", "pdi_415v": 50000, "curve_tipo": "Standard", "Im_10": 2500, "Im_5": 1250},
+    320: {"modello": "Tmax T4N 320", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 3200, "Im_5": 1600},
+    400: {"modello": "Tmax T4N 400", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 4000, "Im_5": 2000},
+    630: {"modello": "Tmax T5N 630", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 6300, "Im_5": 3150},
+    800: {"modello": "Tmax T6N 800", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 8000, "Im_5": 4000},
+    1000: {"modello": "Tmax T6N 1000", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 10000, "Im_5": 5000},
+    1250: {"modello": "Tmax T7N 1250", "pdi_415v": 150000, "curve_tipo": "Standard", "Im_10": 12500, "Im_5": 6250},
+    1600: {"modello": "Tmax T7N 1600", "pdi_415v": 150000, "curve_tipo": "Standard", "Im_10": 16000, "Im_5": 8000},
+    2000: {"modello": "Tmax T8N 2000", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 20000, "Im_5": 10000},
+    2500: {"modello": "Tmax T8N 2500", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 25000, "Im_5": 12500},
+    3200: {"modello": "Tmax T8N 3200", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 32000, "Im_5": 16000}
+})
+
+_INTERRUTTORI_SIEMENS = MappingProxyType({
+    # SIEMENS 3VA - Dati reali da catalogo ufficiale AGGIORNATI
+    160: {"modello": "3VA1 160", "pdi_415v": 36000, "curve_tipo": "Standard", "Im_10": 1600, "Im_5": 800},
+    250: {"modello": "3VA2 250", "pdi_415v": 50000, "curve_tipo": "Standard", "Im_10": 2500, "Im_5": 1250},
+    400: {"modello": "3VA6 400", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 4000, "Im_5": 2000},
+    630: {"modello": "3VA6 630", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 6300, "Im_5": 3150},
+    800: {"modello": "3VA6 800", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 8000, "Im_5": 4000},
+    1250: {"modello": "3VA9 1250", "pdi_415v": 100000, "curve_tipo": "Standard", "Im_10": 12500, "Im_5": 6250},
+    1600: {"modello": "3VA9 1600", "pdi_415v": 100000, "curve_tipo": "Standard", "Im_10": 16000, "Im_5": 8000}
+})
+
+# 🆕 CURVE IEC 60255 REALI CERTIFICATE - FORMULE UFFICIALI
+_CURVE_IEC_60255 = MappingProxyType({
+    "normal_inverse": {"K": 0.14, "alpha": 0.02, "nome": "Normal Inverse IEC 60255"},
+    "very_inverse": {"K": 13.5, "alpha": 1.0, "nome": "Very Inverse IEC 60255"},
+    "extremely_inverse": {"K": 80, "alpha": 2.0, "nome": "Extremely Inverse IEC 60255"}
+})
+# Coppie (K, α) per curva, lette insieme nel calcolo dei tempi di intervento
+_IEC_CURVE_PARAMS = MappingProxyType({
+    curva: (dati["K"], dati["alpha"]) for curva, dati in _CURVE_IEC_60255.items()
+})
+
+# 🆕 RELÈ MT REALI - AGGIORNATI CON DATI FORNITI
+_RELE_ABB = MappingProxyType({
+    "modello": "ABB REF615",
+    "funzioni": ["50/51", "50N/51N", "27/59", "81", "25"],
+    "curve_disponibili": ["normal_inverse", "very_inverse", "extremely_inverse"],
+    "tms_range": {"min": 0.025, "max": 1.2},
+    "comunicazione": ["IEC 61850", "IEC 60870-5-103", "Modbus", "DNP3"],
+    "precisione": "Classe 1",
+    "temperatura": "-25°C to +70°C",
+    "caratteristiche_speciali": [
+        "Autodiagnostica avanzata",
+        "Registrazione eventi",
+        "Sincronizzazione temporale GPS",
+        "Interfaccia HMI locale"
+    ]
+})
+
+_RELE_SIEMENS = MappingProxyType({
+    "modello": "Siemens 7SJ80/7SJ82",
+    "funzioni": ["50/51", "50N/51N", "27/59", "81", "25"],
+    "curve_disponibili": ["normal_inverse", "very_inverse", "extremely_inverse"],
+    "tms_range": {"min": 0.05, "max": 3.2},
+    "comunicazione": ["IEC 61850", "IEC 60870-5-104", "PROFIBUS", "DNP3"],
+    "precisione": "Classe 1",
+    "temperatura": "-25°C to +70°C",
+    "caratteristiche_speciali": [
+        "SIPROTEC 5 platform",
+        "Cybersecurity by design",
+        "Manutenzione predittiva",
+        "Integrazione SCADA"
+    ]
+})
+
+# 🆕 TRASFORMATORI STANDARD + Ucc 8% OPZIONALE
+_TRASFORMATORI_STANDARD = MappingProxyType({
+    "ucc_standard": {
+        100: 4, 160: 4, 250: 4, 315: 4, 400: 4,  # <400kVA = 4%
+        500: 6, 630: 6, 800: 6, 1000: 6, 1250: 6, 1600: 6,  # >400kVA = 6%
+        2000: 6, 2500: 6, 3150: 6
+    },
+    "ucc_ottimizzata": dict(_UCC),  # Tutti a 8%
+    "collegamento": "Dyn11",
+    "tipo_raccomandato": "Cast Resin (Resina Epossidica)",
+    "vantaggi_cast_resin": [
+        "Autoestinguente - sicurezza antincendio",
+        "Resistente umidità e inquinamento",
+        "Manutenzione ridotta",
+        "Ingombri contenuti",
+        "Installazione indoor/outdoor"
+    ]
+})
+
+
+class CabinaMTBT:
+    # Tabelle statiche condivise da tutte le istanze (costanti di modulo in sola lettura)
+    interruttori_abb = _INTERRUTTORI_ABB
+    interruttori_siemens = _INTERRUTTORI_SIEMENS
+    curve_iec_60255 = _CURVE_IEC_60255
+    rele_abb = _RELE_ABB
+    rele_siemens = _RELE_SIEMENS
+    trasformatori_standard = _TRASFORMATORI_STANDARD
+
+    def __init__(self):
         # Dati rete MT
         self.V_mt = 20000  # V
         self.V_bt = 400    # V
         self.Um_mt = 24000 # V (tensione massima)
         self.Icc_rete = 12500  # A (corrente cortocircuito rete)
-        
-        # 🆕 DATABASE PRODUTTORI REALI CERTIFICATI - AGGIORNATO CON DATI FORNITI
-        self.interruttori_abb = {
-            # ABB TMAX - Dati reali da catalogo ufficiale AGGIORNATI
-            160: {"modello": "Tmax T1C 160", "pdi_415v": 36000, "curve_tipo": "Standard", "Im_10": 1600, "Im_5": 800},
-            250: {"modello": "Tmax T2N 250", "pdi_415v": 50000, "curve_tipo": "Standard", "Im_10": 2500, "Im_5": 1250},
-            320: {"modello": "Tmax T4N 320", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 3200, "Im_5": 1600},
-            400: {"modello": "Tmax T4N 400", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 4000, "Im_5": 2000},
-            630: {"modello": "Tmax T5N 630", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 6300, "Im_5": 3150},
-            800: {"modello": "Tmax T6N 800", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 8000, "Im_5": 4000},
-            1000: {"modello": "Tmax T6N 1000", "pdi_415v": 200000, "curve_tipo": "Standard", "Im_10": 10000, "Im_5": 5000},
-            1250: {"modello": "Tmax T7N 1250", "pdi_415v": 150000, "curve_tipo": "Standard", "Im_10": 12500, "Im_5": 6250},
-            1600: {"modello": "Tmax T7N 1600", "pdi_415v": 150000, "curve_tipo": "Standard", "Im_10": 16000, "Im_5": 8000},
-            2000: {"modello": "Tmax T8N 2000", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 20000, "Im_5": 10000},
-            2500: {"modello": "Tmax T8N 2500", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 25000, "Im_5": 12500},
-            3200: {"modello": "Tmax T8N 3200", "pdi_415v": 130000, "curve_tipo": "Standard", "Im_10": 32000, "Im_5": 16000}
-        }
-        
-        self.interruttori_siemens = {
-            # SIEMENS 3VA - Dati reali da catalogo ufficiale AGGIORNATI
-            160: {"modello": "3VA1 160", "pdi_415v": 36000, "curve_tipo": "Standard", "Im_10": 1600, "Im_5": 800},
-            250: {"modello": "3VA2 250", "pdi_415v": 50000, "curve_tipo": "Standard", "Im_10": 2500, "Im_5": 1250},
-            400: {"modello": "3VA6 400", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 4000, "Im_5": 2000},
-            630: {"modello": "3VA6 630", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 6300, "Im_5": 3150},
-            800: {"modello": "3VA6 800", "pdi_415v": 85000, "curve_tipo": "Standard", "Im_10": 8000, "Im_5": 4000},
-            1250: {"modello": "3VA9 1250", "pdi_415v": 100000, "curve_tipo": "Standard", "Im_10": 12500, "Im_5": 6250},
-            1600: {"modello": "3VA9 1600", "pdi_415v": 100000, "curve_tipo": "Standard", "Im_10": 16000, "Im_5": 8000}
-        }
-        
-        # 🆕 CURVE IEC 60255 REALI CERTIFICATE - FORMULE UFFICIALI
-        self.curve_iec_60255 = {
-            "normal_inverse": {"K": 0.14, "alpha": 0.02, "nome": "Normal Inverse IEC 60255"},
-            "very_inverse": {"K": 13.5, "alpha": 1.0, "nome": "Very Inverse IEC 60255"},
-            "extremely_inverse": {"K": 80, "alpha": 2.0, "nome": "Extremely Inverse IEC 60255"}
-        }
-        
-        # 🆕 RELÈ MT REALI - AGGIORNATI CON DATI FORNITI
-        self.rele_abb = {
-            "modello": "ABB REF615",
-            "funzioni": ["50/51", "50N/51N", "27/59", "81", "25"],
-            "curve_disponibili": ["normal_inverse", "very_inverse", "extremely_inverse"],
-            "tms_range": {"min": 0.025, "max": 1.2},
-            "comunicazione": ["IEC 61850", "IEC 60870-5-103", "Modbus", "DNP3"],
-            "precisione": "Classe 1",
-            "temperatura": "-25°C to +70°C",
-            "caratteristiche_speciali": [
-                "Autodiagnostica avanzata",
-                "Registrazione eventi",
-                "Sincronizzazione temporale GPS",
-                "Interfaccia HMI locale"
-            ]
-        }
-        
-        self.rele_siemens = {
-            "modello": "Siemens 7SJ80/7SJ82",
-            "funzioni": ["50/51", "50N/51N", "27/59", "81", "25"],
-            "curve_disponibili": ["normal_inverse", "very_inverse", "extremely_inverse"],
-            "tms_range": {"min": 0.05, "max": 3.2},
-            "comunicazione": ["IEC 61850", "IEC 60870-5-104", "PROFIBUS", "DNP3"],
-            "precisione": "Classe 1",
-            "temperatura": "-25°C to +70°C",
-            "caratteristiche_speciali": [
-                "SIPROTEC 5 platform",
-                "Cybersecurity by design",
-                "Manutenzione predittiva",
-                "Integrazione SCADA"
-            ]
-        }
-
-        # 🆕 TRASFORMATORI STANDARD + Ucc 8% OPZIONALE
-        self.trasformatori_standard = {
-            "ucc_standard": {
-                100: 4, 160: 4, 250: 4, 315: 4, 400: 4,  # <400kVA = 4%
-                500: 6, 630: 6, 800: 6, 1000: 6, 1250: 6, 1600: 6,  # >400kVA = 6%
-                2000: 6, 2500: 6, 3150: 6
-            },
-            "ucc_ottimizzata": {p: 8 for p in self.potenze_normalizzate},  # Tutti a 8%
-            "collegamento": "Dyn11",
-            "tipo_raccomandato": "Cast Resin (Resina Epossidica)",
-            "vantaggi_cast_resin": [
-                "Autoestinguente - sicurezza antincendio",
-                "Resistente umidità e inquinamento",
-                "Manutenzione ridotta",
-                "Ingombri contenuti",
-                "Installazione indoor/outdoor"
-            ]
-        }
 
     def genera_raccomandazioni_ingegneristiche(self, potenza_trasf):
         """
@@ -178,18 +579,8 @@ class CabinaMTBT:
         """
         
         # Classificazione impianto
-        if potenza_trasf <= 400:
-            categoria = "PICCOLA"
-            criticita = "BASSA"
-            complessita = "SEMPLICE"
-        elif potenza_trasf <= 1000:
-            categoria = "MEDIA"
-            criticita = "MEDIA"
-            complessita = "STANDARD"
-        else:
-            categoria = "GRANDE"  
-            criticita = "ALTA"
-            complessita = "COMPLESSA"
+        categoria, criticita, complessita = _CLASSI_IMPIANTO[
+            bisect.bisect_left(_SOGLIE_CATEGORIA, potenza_trasf)]
 
         # Calcolo costi indicativi realistici (basati su esperienza mercato)
         costo_ucc8 = potenza_trasf * 35 + 8000  # €35/kVA + fisso per Ucc 8%
@@ -452,11 +843,11 @@ class CabinaMTBT:
         taglie_disponibili = sorted(db_interruttori.keys())
         interruttore_bt = None
         
-        for taglia in taglie_disponibili:
-            if taglia >= I_bt * 1.1:  # Margine 10%
-                interruttore_bt = db_interruttori[taglia].copy()
-                interruttore_bt["taglia"] = taglia
-                break
+        i_taglia = bisect.bisect_left(taglie_disponibili, I_bt * 1.1)  # Margine 10%
+        if i_taglia < len(taglie_disponibili):
+            taglia = taglie_disponibili[i_taglia]
+            interruttore_bt = db_interruttori[taglia].copy()
+            interruttore_bt["taglia"] = taglia
         
         if not interruttore_bt:
             # Fallback alla taglia più grande
@@ -466,17 +857,13 @@ class CabinaMTBT:
             interruttore_bt["note"] = "⚠️ Taglia massima disponibile"
         
         # Seleziona relè MT reale
-        rapporti_ta_std = [5, 10, 15, 20, 25, 30, 40, 50, 60, 75, 100, 150, 200]
-        primario_ta = 30
-        for r in rapporti_ta_std:
-            if r >= I_mt * 1.5:
-                primario_ta = r
-                break
+        i_ta = bisect.bisect_left(_RAPPORTI_TA_STD, I_mt * 1.5)
+        primario_ta = _RAPPORTI_TA_STD[i_ta] if i_ta < len(_RAPPORTI_TA_STD) else 30
         
         # Calcola cortocircuito con Ucc 8%
-        ucc = self.ucc[potenza_trasf] / 100
+        ucc = _UCC_PU[potenza_trasf]
         Z_trasf = ucc * (self.V_bt ** 2) / (potenza_trasf * 1000)
-        Icc_bt_reale = self.V_bt / (math.sqrt(3) * Z_trasf)
+        Icc_bt_reale = self.V_bt / (_SQRT3 * Z_trasf)
         
         # Verifica PDI interruttore
         pdi_richiesto = Icc_bt_reale
@@ -488,9 +875,9 @@ class CabinaMTBT:
             "trasformatore": {
                 "marca": marca_trasf,
                 "potenza": f"{potenza_trasf} kVA",
-                "ucc": "8%",
+                "ucc": f"{_UCC[potenza_trasf]}%",
                 "collegamento": "Dyn11",
-                "specifica_completa": f"{marca_trasf} {potenza_trasf}kVA 20kV/400V Ucc 8%"
+                "specifica_completa": f"{marca_trasf} {potenza_trasf}kVA 20kV/400V Ucc {_UCC[potenza_trasf]}%"
             },
             "interruttore_bt": {
                 "marca": produttore.upper(),
@@ -533,9 +920,7 @@ class CabinaMTBT:
         if corrente <= corrente_pickup:
             return float('inf')
         
-        curve_data = self.curve_iec_60255[tipo_curva]
-        K = curve_data["K"]
-        alpha = curve_data["alpha"]
+        K, alpha = _IEC_CURVE_PARAMS[tipo_curva]
         
         rapporto = corrente / corrente_pickup
         
@@ -548,7 +933,8 @@ class CabinaMTBT:
             tempo = max(tempo, 0.05)  # Minimo 50ms
             tempo = min(tempo, 300.0)  # Massimo 300s
             return round(tempo, 3)
-        except:
+        except (ZeroDivisionError, OverflowError):
+            # (I/Is)^α arrotondato a 1 o fuori dal campo dei float: nessun intervento
             return float('inf')
 
     def calcola_tempo_interruttore_reale(self, corrente, modello_interruttore, taglia):
@@ -729,12 +1115,16 @@ class CabinaMTBT:
         # Valutazione realistica con prodotti reali
         if percentuale_successo >= 85:
             valutazione = f"✅ SELETTIVITA' ECCELLENTE ({produttore} Ucc 8%)"
+            livello = "ok"
         elif percentuale_successo >= 70:
             valutazione = f"✅ SELETTIVITA' BUONA ({produttore} Ucc 8%)"
+            livello = "ok"
         elif percentuale_successo >= 55:
             valutazione = f"⚠️ SELETTIVITA' ACCETTABILE ({produttore} Ucc 8%)"
+            livello = "warn"
         else:
             valutazione = f"❌ SELETTIVITA' CRITICA ({produttore})"
+            livello = "err"
 
         return {
             "produttore_utilizzato": produttore,
@@ -754,6 +1144,7 @@ class CabinaMTBT:
             "n_problemi": n_problemi,
             "percentuale_successo": percentuale_successo,
             "valutazione_complessiva": valutazione,
+            "livello_valutazione": livello,
             "vantaggi_prodotti_reali": [
                 f"🔧 {produttore}: Prodotti certificati da catalogo ufficiale",
                 f"🔧 Interruttore BT: {interruttore_bt['specifica_completa']}",
@@ -775,15 +1166,65 @@ class CabinaMTBT:
         """Calcola potenza trasformatore necessaria"""
         potenza_necessaria = (potenza_carichi * f_contemporaneita * margine) / cos_phi
         
-        for p in self.potenze_normalizzate:
-            if p >= potenza_necessaria:
-                return p, potenza_necessaria
-        return self.potenze_normalizzate[-1], potenza_necessaria
+        i_potenza = bisect.bisect_left(_POTENZE_NORMALIZZATE, potenza_necessaria)
+        if i_potenza < len(_POTENZE_NORMALIZZATE):
+            return _POTENZE_NORMALIZZATE[i_potenza], potenza_necessaria
+        return _POTENZE_NORMALIZZATE[-1], potenza_necessaria
+
+    def calcola_potenza_trasformatore_batch(self, potenza_carichi, f_contemporaneita=0.7, cos_phi=0.85, margine=1.2):
+        """
+        Variante vettoriale di calcola_potenza_trasformatore per analisi di sensibilità:
+        accetta array (o scalari combinabili per broadcasting) e restituisce gli array
+        di taglie normalizzate e potenze necessarie, uno per scenario
+        """
+        potenza_necessaria = (np.asarray(potenza_carichi, dtype=float) * f_contemporaneita * margine) / cos_phi
+        i_potenza = np.searchsorted(_POTENZE_ARRAY, potenza_necessaria)
+        return _POTENZE_ARRAY[np.minimum(i_potenza, len(_POTENZE_ARRAY) - 1)], potenza_necessaria
+
+    def dimensiona_scenari(self, scenari):
+        """
+        Dimensionamento di molti scenari in un solo passaggio vettoriale.
+
+        scenari: DataFrame con la colonna potenza_carichi (kW) e, facoltative,
+        f_contemporaneita, cos_phi, margine, lunghezza_mt, lunghezza_bt, sez_mt, sez_bt
+        (in mancanza valgono i default dei singoli metodi). Restituisce un DataFrame
+        con una riga per scenario: taglia, correnti, Icc BT ai morsetti del
+        trasformatore e cadute di tensione delle linee.
+        """
+        potenza_trasf, potenza_necessaria = self.calcola_potenza_trasformatore_batch(
+            scenari["potenza_carichi"].to_numpy(dtype=float),
+            scenari.get("f_contemporaneita", 0.7),
+            scenari.get("cos_phi", 0.85),
+            scenari.get("margine", 1.2))
+        potenza_necessaria = np.asarray(potenza_necessaria)
+        I_mt, I_bt = self.calcola_correnti(potenza_trasf)
+
+        # Cortocircuito BT senza cavi, come calcola_cortocircuito_bt_completo
+        ucc = _UCC_PU_ARRAY[np.searchsorted(_POTENZE_ARRAY, potenza_trasf)]
+        Z_trasf = ucc * (self.V_bt ** 2) / (potenza_trasf * 1000)
+        Icc_bt = self.V_bt / (_SQRT3 * Z_trasf)
+
+        cadute = self.calcola_cadute_tensione(
+            I_mt, I_bt,
+            scenari.get("lunghezza_mt", 50), scenari.get("lunghezza_bt", 30),
+            scenari.get("sez_mt", 120), scenari.get("sez_bt", 185))
+
+        return pd.DataFrame({
+            "potenza_necessaria_kva": potenza_necessaria,
+            "potenza_trasf_kva": potenza_trasf,
+            "I_mt": I_mt,
+            "I_bt": I_bt,
+            "Icc_bt": Icc_bt,
+            "dV_mt_perc": cadute["dV_mt_perc"],
+            "dV_bt_perc": cadute["dV_bt_perc"],
+            "verifica_mt": cadute["verifica_mt"],
+            "verifica_bt": cadute["verifica_bt"]
+        }, index=scenari.index)
 
     def calcola_correnti(self, potenza_trasf):
         """Calcola correnti nominali MT e BT"""
-        I_mt = potenza_trasf * 1000 / (math.sqrt(3) * self.V_mt)
-        I_bt = potenza_trasf * 1000 / (math.sqrt(3) * self.V_bt)
+        I_mt = potenza_trasf * 1000 / (_SQRT3 * self.V_mt)
+        I_bt = potenza_trasf * 1000 / (_SQRT3 * self.V_bt)
         return I_mt, I_bt
 
     def calcola_cortocircuito_bt_completo(self, potenza_trasf, cavi_bt_sezione=None, lunghezza_bt=30):
@@ -792,26 +1233,15 @@ class CabinaMTBT:
         AGGIORNATO: Usa Ucc 8% per tutti i trasformatori
         """
         # Impedenza trasformatore con Ucc 8%
-        ucc = self.ucc[potenza_trasf] / 100  # Ora sempre 8%
+        ucc = _UCC_PU[potenza_trasf]  # Ora sempre 8%
         Z_trasf = ucc * (self.V_bt ** 2) / (potenza_trasf * 1000)
         
         # Impedenza cavi BT
         if cavi_bt_sezione:
-            # Resistenza cavo BT (Ω/km) - Database realistico
-            R_cavi_bt = {
-                35: 0.641, 50: 0.443, 70: 0.320, 95: 0.236, 120: 0.188,
-                150: 0.150, 185: 0.123, 240: 0.094, 300: 0.075, 400: 0.057,
-                500: 0.045, 630: 0.036
-            }
-            
-            X_cavi_bt = {
-                35: 0.065, 50: 0.060, 70: 0.060, 95: 0.055, 120: 0.055,
-                150: 0.050, 185: 0.050, 240: 0.045, 300: 0.045, 400: 0.040,
-                500: 0.040, 630: 0.035
-            }
-            
-            R_cavo = R_cavi_bt.get(cavi_bt_sezione, 0.036) * (lunghezza_bt / 1000)
-            X_cavo = X_cavi_bt.get(cavi_bt_sezione, 0.035) * (lunghezza_bt / 1000)
+            # Resistenza e reattanza cavo BT (Ω/km) dal database cavi
+            dati_cavo = _CAVI_BT_PRO.get(cavi_bt_sezione, {"R": 0.036, "X": 0.035})
+            R_cavo = dati_cavo["R"] * (lunghezza_bt / 1000)
+            X_cavo = dati_cavo["X"] * (lunghezza_bt / 1000)
             Z_cavo = math.sqrt(R_cavo**2 + X_cavo**2)
         else:
             Z_cavo = 0
@@ -822,7 +1252,7 @@ class CabinaMTBT:
         Z_totale = Z_trasf + Z_cavo
         
         # Cortocircuito BT con Ucc 8%
-        Icc_bt = self.V_bt / (math.sqrt(3) * Z_totale)
+        Icc_bt = self.V_bt / (_SQRT3 * Z_totale)
         
         return {
             'Icc_bt': Icc_bt,
@@ -840,15 +1270,11 @@ class CabinaMTBT:
         Verifica tenuta termica cavi durante cortocircuito
         """
         # Costanti termiche secondo IEC 60364-5-54
-        K_termiche = {
-            "BT": 115,  # A√s/mm² per cavi BT rame/XLPE
-            "MT": 142   # A√s/mm² per cavi MT rame/XLPE
-        }
-        
-        K = K_termiche.get(tipo_cavo, 115)
+        K = _K_TERMICHE.get(tipo_cavo, 115)
         
         # Sezione minima per tenuta termica
-        S_min_termica = (Icc * math.sqrt(t_eliminazione)) / K
+        radice_t = _RADICE_T_ELIMINAZIONE.get(t_eliminazione) or math.sqrt(t_eliminazione)
+        S_min_termica = (Icc * radice_t) / K
         
         verifica = "✅ OK" if sezione >= S_min_termica else "❌ INSUFFICIENTE"
         
@@ -877,10 +1303,10 @@ class CabinaMTBT:
         # Diametro equivalente cavo (mm → m)
         if tipo_cavo == "MT":
             # Per cavi MT con isolamento maggiore
-            diametro_equiv = math.sqrt(sezione_cavi_mmq / math.pi) * 2.5 / 1000  # m
+            diametro_equiv = math.sqrt(sezione_cavi_mmq * _INV_PI) * 2.5 / 1000  # m
         else:
             # Per cavi BT
-            diametro_equiv = math.sqrt(sezione_cavi_mmq / math.pi) * 1.8 / 1000  # m
+            diametro_equiv = math.sqrt(sezione_cavi_mmq * _INV_PI) * 1.8 / 1000  # m
         
         # Formula DM 29/05/2008
         dpa_su_radice_i = 0.40942 * (diametro_equiv ** 0.5241)
@@ -911,29 +1337,21 @@ class CabinaMTBT:
         Dimensiona protezioni MT secondo CEI 0-16
         """
         # Interruttore MT
-        taglie_int = [630, 1250, 1600, 2000, 2500, 3150]
-        I_int = 630
-        for t in taglie_int:
-            if t >= I_mt * 5:
-                I_int = t
-                break
+        i_int = bisect.bisect_left(_TAGLIE_INT_MT, I_mt * 5)
+        I_int = _TAGLIE_INT_MT[i_int] if i_int < len(_TAGLIE_INT_MT) else 630
 
         # TA protezione
-        rapporti_ta = [5, 10, 15, 20, 25, 30, 40, 50, 60, 75, 100]
-        primario_ta = 30
-        for r in rapporti_ta:
-            if r >= I_mt * 1.5:
-                primario_ta = r
-                break
-
-        # Tarature relè
+        i_ta = bisect.bisect_left(_RAPPORTI_TA, I_mt * 1.5)
+        primario_ta = _RAPPORTI_TA[i_ta] if i_ta < len(_RAPPORTI_TA) else 30
+
+        # Tarature relè: (soglia, unità, tempo di intervento s o None), formattate in visualizzazione
         tarature = {
-            "50 (Istantanea)": f"{I_mt * 20:.1f} A",
-            "51 (Temporizzata)": f"{I_mt * 1.25:.1f} A, t=0.4s",
-            "50N (Terra Istant.)": "2.0 A",
-            "51N (Terra Temp.)": "1.0 A, t=0.2s",
-            "27 (Min Tensione)": "17.0 kV",
-            "59 (Max Tensione)": "22.0 kV"
+            "50 (Istantanea)": (I_mt * 20, "A", None),
+            "51 (Temporizzata)": (I_mt * 1.25, "A", 0.4),
+            "50N (Terra Istant.)": (2.0, "A", None),
+            "51N (Terra Temp.)": (1.0, "A", 0.2),
+            "27 (Min Tensione)": (17.0, "kV", None),
+            "59 (Max Tensione)": (22.0, "kV", None)
         }
 
         return {
@@ -970,77 +1388,6 @@ class CabinaMTBT:
         # 4. RITARDO 50 MT - CORREZIONE: Molto maggiore per coordinamento
         ritardo_50_mt = 0.50  # Era 0.30, ora 0.50s
         
-        def tempo_rele_51_mt_ucc8(corrente, TMS=TMS_51_ottimizzato):
-            """
-            Curva NORMALE INVERSE ottimizzata per Ucc 8%
-            """
-            if corrente < I_rele_51_mt:
-                return float('inf')
-            
-            rapporto = corrente / I_rele_51_mt
-            if rapporto <= 1.0:
-                return float('inf')
-            
-            # Formula IEC Normal Inverse ottimizzata
-            tempo_base = TMS * (13.5 / (rapporto - 1))
-            
-            # Limiti ottimizzati per Ucc 8%
-            tempo_base = max(tempo_base, 0.08)  # Era 0.1, ora 0.08
-            tempo_base = min(tempo_base, 80.0)   # Era 100, ora 80
-            
-            return round(tempo_base, 3)
-
-        def tempo_rele_50_mt_ucc8(corrente):
-            """Relè 50 MT ottimizzato per Ucc 8%"""
-            if corrente >= I_rele_50_mt:
-                return ritardo_50_mt  # 200ms invece di 250ms
-            else:
-                return float('inf')
-
-        def tempo_interruttore_bt_ucc8(corrente, I_int_bt, K_mag=8, K_term=1.25):
-            """
-            Curve magnetotermiche CORRETTE per coordinamento con Ucc 8%
-            AGGIORNAMENTO: Curve più aggressive per migliore coordinamento
-            """
-            I_mag_bt = I_int_bt * K_mag      # Ridotto a 8 per intervento più veloce
-            I_term_bt = I_int_bt * K_term    # Ridotto a 1.25 per soglia più bassa
-            
-            if corrente >= I_mag_bt:
-                return 0.005  # Magnetico istantaneo più veloce
-            elif corrente >= I_term_bt:
-                rapporto = corrente / I_int_bt
-                
-                # Curve termiche AGGRESSIVE per coordinamento selettivo
-                if rapporto >= 25:       # Soglia ridotta
-                    return 0.010         # Molto veloce per CC alti
-                elif rapporto >= 15:     # Soglia ridotta
-                    return 0.020         # Veloce per CC medi
-                elif rapporto >= 8:      # Soglia ridotta
-                    return 0.050         # Più veloce per sovraccarichi alti
-                elif rapporto >= 4:      # Soglia ridotta
-                    return 0.150         # Più veloce per sovraccarichi medi
-                elif rapporto >= 2.0:    # Soglia ridotta
-                    return 1.0           # Drasticamente ridotto da 18s a 1s
-                else:
-                    # Formula termica più aggressiva
-                    return min(200 / (rapporto**1.5), 200)  # Molto più veloce
-            else:
-                return float('inf')
-
-        # ===== MARGINI DINAMICI PER UCC 8% =====
-        def calcola_margine_richiesto_ucc8(I_test):
-            """Margini OTTIMIZZATI per coordinamento perfetto Ucc 8%"""
-            if I_test >= Icc_bt * 0.8:
-                return 0.20   # Era 0.25, ora 0.20s (meno conservativo)
-            elif I_test >= Icc_bt * 0.4:
-                return 0.25   # Era 0.30, ora 0.25s  
-            elif I_test >= I_bt * 15:
-                return 0.30   # Era 0.35, ora 0.30s
-            elif I_test >= I_bt * 5:
-                return 0.30   # Era 0.40, ora 0.30s (molto meno conservativo)
-            else:
-                return 0.35   # Era 0.45, ora 0.35s
-
         # ===== ANALISI SELETTIVITÀ =====
         
         # Interruttore BT
@@ -1061,64 +1408,64 @@ class CabinaMTBT:
         risultati_selettivita = []
         problemi_coordinamento = []
 
-        for I_test in correnti_test:
-            # Tempi lato BT (ottimizzati per Ucc 8%)
-            t_bt = tempo_interruttore_bt_ucc8(I_test, I_int_bt)
-
-            # Tempi lato MT (ottimizzati per Ucc 8%)
-            I_test_mt = I_test * (self.V_bt / self.V_mt)
-            t_mt_51 = tempo_rele_51_mt_ucc8(I_test_mt)
-            t_mt_50 = tempo_rele_50_mt_ucc8(I_test_mt)
-            t_mt = min(t_mt_51, t_mt_50)
-
-            # Protezione attiva
-            if t_mt == t_mt_50 and t_mt_50 != float('inf'):
-                protezione_mt_attiva = "50 (istantaneo)"
-            elif t_mt == t_mt_51 and t_mt_51 != float('inf'):
-                protezione_mt_attiva = "51 (temporizzato)"
-            else:
-                protezione_mt_attiva = "Nessuna"
-
-            # Margine dinamico per Ucc 8%
-            margine_richiesto = calcola_margine_richiesto_ucc8(I_test)
-
-            # Verifica selettività
-            if t_bt != float('inf') and t_mt != float('inf'):
-                margine_effettivo = t_mt - t_bt
-                
-                if margine_effettivo >= margine_richiesto:
-                    selettivita = "✅ OK"
-                elif margine_effettivo >= margine_richiesto * 0.85:  # Era 0.8, ora 0.85
-                    selettivita = "⚠️ LIMITE"
-                else:
-                    selettivita = "❌ NO"
-                    problemi_coordinamento.append({
-                        "corrente_kA": I_test / 1000,
-                        "tempo_bt_ms": t_bt * 1000,
-                        "tempo_mt_ms": t_mt * 1000,
-                        "margine_ms": margine_effettivo * 1000,
-                        "richiesto_ms": margine_richiesto * 1000,
-                        "protezione_mt": protezione_mt_attiva
-                    })
-            elif t_bt != float('inf') and t_mt == float('inf'):
-                selettivita = "✅ PERFETTO"
-                margine_effettivo = "∞"
-            elif t_bt == float('inf') and t_mt != float('inf'):
-                selettivita = "⚠️ SOLO MT"
-                margine_effettivo = "N/A"
-            else:
-                selettivita = "✅ OK"
-                margine_effettivo = "N/A"
+        # Tempi di intervento BT, 51 MT e 50 MT di tutti i punti di prova (ottimizzati per Ucc 8%)
+        tempi = _tempi_intervento_ucc8(
+            correnti_test, I_int_bt, I_rele_51_mt, I_rele_50_mt, TMS_51_ottimizzato,
+            ritardo_50_mt, self.V_bt / self.V_mt)
+
+        correnti = np.asarray(correnti_test)
+        t_bt = tempi[:, 0]
+        t_mt_51 = tempi[:, 1]
+        t_mt_50 = tempi[:, 2]
+        t_mt = np.minimum(t_mt_51, t_mt_50)
+        codice_scatto = (np.isfinite(t_bt).astype(np.uint8) << 1) | np.isfinite(t_mt).astype(np.uint8)
+        entrambe = codice_scatto == 3
+
+        # Protezione attiva: 0 = 50, 1 = 51, 2 = nessuna
+        codice_prot = np.select(
+            [np.isfinite(t_mt_50) & (t_mt_50 <= t_mt_51), np.isfinite(t_mt_51)], [0, 1], default=2)
+
+        # Margini OTTIMIZZATI per coordinamento perfetto Ucc 8%
+        margine_richiesto = np.select(
+            [correnti >= Icc_bt * 0.8,    # Era 0.25, ora 0.20s (meno conservativo)
+             correnti >= Icc_bt * 0.4,    # Era 0.30, ora 0.25s
+             correnti >= I_bt * 15,       # Era 0.35, ora 0.30s
+             correnti >= I_bt * 5],       # Era 0.40, ora 0.30s (molto meno conservativo)
+            [0.20, 0.25, 0.30, 0.30], default=0.35)   # Era 0.45, ora 0.35s
+
+        # Verifica selettività: indice in _ESITI_SELETTIVITA
+        with np.errstate(invalid="ignore"):
+            margine_effettivo = t_mt - t_bt
+        grado_margine = np.select(
+            [margine_effettivo >= margine_richiesto,
+             margine_effettivo >= margine_richiesto * 0.85],  # Era 0.8, ora 0.85
+            [0, 1], default=2)
+        codice_esito = np.where(entrambe, 3 + grado_margine, codice_scatto)
+
+        for (I_test, tb, tm, prot, scatto, esito, margine, richiesto) in zip(
+                correnti_test, t_bt.tolist(), t_mt.tolist(), codice_prot.tolist(),
+                codice_scatto.tolist(), codice_esito.tolist(), margine_effettivo.tolist(),
+                margine_richiesto.tolist()):
+            protezione_mt_attiva = _PROTEZIONI_MT_ATTIVE[prot]
+            if esito == _ESITO_NO:
+                problemi_coordinamento.append({
+                    "corrente_kA": I_test / 1000,
+                    "tempo_bt_ms": tb * 1000,
+                    "tempo_mt_ms": tm * 1000,
+                    "margine_ms": margine * 1000,
+                    "richiesto_ms": richiesto * 1000,
+                    "protezione_mt": protezione_mt_attiva
+                })
 
             risultati_selettivita.append({
                 "corrente_test_A": I_test,
                 "corrente_test_kA": I_test / 1000,
-                "tempo_bt_s": t_bt if t_bt != float('inf') else "∞",
-                "tempo_mt_s": t_mt if t_mt != float('inf') else "∞",
+                "tempo_bt_s": tb if scatto & 2 else "∞",
+                "tempo_mt_s": tm if scatto & 1 else "∞",
                 "protezione_mt": protezione_mt_attiva,
-                "selettivita": selettivita,
-                "margine_s": margine_effettivo,
-                "margine_richiesto_s": margine_richiesto if t_bt != float('inf') and t_mt != float('inf') else "N/A"
+                "selettivita": _ESITI_SELETTIVITA[esito],
+                "margine_s": margine if scatto == 3 else _MARGINI_SENZA_CONFRONTO[scatto],
+                "margine_richiesto_s": richiesto if scatto == 3 else "N/A"
             })
 
         # Valutazione complessiva CORRETTA per Ucc 8%
@@ -1129,12 +1476,16 @@ class CabinaMTBT:
         # Soglie OTTIMIZZATE per valutazione Ucc 8%
         if percentuale_successo >= 75:  # Era 80, ora 75 (più ragionevole)
             valutazione = "✅ SELETTIVITA' ECCELLENTE (Ucc 8%)"
+            livello = "ok"
         elif percentuale_successo >= 60:  # Era 65, ora 60
             valutazione = "✅ SELETTIVITA' BUONA (Ucc 8%)"
+            livello = "ok"
         elif percentuale_successo >= 45:  # Era 50, ora 45
             valutazione = "⚠️ SELETTIVITA' ACCETTABILE (Ucc 8%)"
+            livello = "warn"
         else:
             valutazione = "❌ SELETTIVITA' CRITICA"
+            livello = "err"
 
         return {
             "tarature_mt_ottimizzate": {
@@ -1152,6 +1503,7 @@ class CabinaMTBT:
             "n_problemi": n_problemi,
             "percentuale_successo": percentuale_successo,
             "valutazione_complessiva": valutazione,
+            "livello_valutazione": livello,
             "miglioramenti_ucc8": [
                 "🔧 Trasformatore Ucc 8% - Impedenza maggiore per selettività naturale",
                 "🔧 Taratura 51 MT ottimizzata a 150% (coordinamento robusto)",
@@ -1177,20 +1529,11 @@ class CabinaMTBT:
 
     def dimensiona_protezioni_bt(self, I_bt, Icc_bt):
         """Dimensiona protezioni BT"""
-        taglie_bt = [160, 250, 400, 630, 800, 1000, 1250, 1600, 2000, 2500, 3200]
-        I_gen_bt = 630
-        for t in taglie_bt:
-            if t >= I_bt * 1.1:
-                I_gen_bt = t
-                break
+        i_gen = bisect.bisect_left(_TAGLIE_INT_BT, I_bt * 1.1)
+        I_gen_bt = _TAGLIE_INT_BT[i_gen] if i_gen < len(_TAGLIE_INT_BT) else 630
 
         # Potere di interruzione adeguato per Ucc 8% (Icc più bassa)
-        if Icc_bt < 20000:      # Soglia ridotta grazie a Ucc 8%
-            pdi = 25
-        elif Icc_bt < 30000:    # Era 35000, ora 30000
-            pdi = 35
-        else:
-            pdi = 50
+        pdi = _PDI_BT_KA[bisect.bisect_right(_SOGLIE_ICC_PDI, Icc_bt)]
 
         # Differenziale
         Idn = 300 if I_gen_bt <= 630 else 500
@@ -1233,130 +1576,38 @@ class CabinaMTBT:
                                            n_cavi_raggruppati_mt=1, n_cavi_raggruppati_bt=1):
         """Calcolo cavi con fattori di correzione professionali secondo CEI"""
         
-        # Database cavi con R, X reali (Ω/km)
-        cavi_mt_pro = {
-            35: {"R": 0.868, "X": 0.115, "portata_base": 140},
-            50: {"R": 0.641, "X": 0.110, "portata_base": 170},
-            70: {"R": 0.443, "X": 0.105, "portata_base": 210},
-            95: {"R": 0.320, "X": 0.100, "portata_base": 250},
-            120: {"R": 0.253, "X": 0.095, "portata_base": 285},
-            150: {"R": 0.206, "X": 0.090, "portata_base": 320},
-            185: {"R": 0.164, "X": 0.085, "portata_base": 370},
-            240: {"R": 0.125, "X": 0.080, "portata_base": 430},
-            300: {"R": 0.100, "X": 0.075, "portata_base": 490},
-            400: {"R": 0.075, "X": 0.070, "portata_base": 570},
-            500: {"R": 0.060, "X": 0.065, "portata_base": 650}
-        }
-
-        cavi_bt_pro = {
-            35: {"R": 0.641, "X": 0.065, "portata_base": 138},
-            50: {"R": 0.443, "X": 0.060, "portata_base": 168},
-            70: {"R": 0.320, "X": 0.060, "portata_base": 207},
-            95: {"R": 0.236, "X": 0.055, "portata_base": 252},
-            120: {"R": 0.188, "X": 0.055, "portata_base": 290},
-            150: {"R": 0.150, "X": 0.050, "portata_base": 330},
-            185: {"R": 0.123, "X": 0.050, "portata_base": 375},
-            240: {"R": 0.094, "X": 0.045, "portata_base": 435},
-            300: {"R": 0.075, "X": 0.045, "portata_base": 495},
-            400: {"R": 0.057, "X": 0.040, "portata_base": 695},
-            500: {"R": 0.045, "X": 0.040, "portata_base": 800},
-            630: {"R": 0.036, "X": 0.035, "portata_base": 1200}
-        }
-
         # Fattori di correzione
-        k_temp = {30: 1.0, 35: 0.96, 40: 0.91, 45: 0.85, 50: 0.78}.get(temp_ambiente, 0.95)
-        k_raggr = {1: 1.0, 2: 0.85, 3: 0.75, 4: 0.70, 6: 0.60, 9: 0.55}.get(n_cavi_raggruppati_mt, 0.8)
-        k_raggr_bt = {1: 1.0, 2: 0.85, 3: 0.75, 4: 0.70, 6: 0.60, 9: 0.55}.get(n_cavi_raggruppati_bt, 0.75)
-        k_posa = {"aria": 1.0, "cavidotto": 0.85, "interrato": 0.80, "passerella": 0.95}.get(tipo_posa, 0.80)
+        k_temp = float(np.interp(temp_ambiente, _K_TEMP_T, _K_TEMP_K))
+        k_raggr = float(np.interp(n_cavi_raggruppati_mt, _K_RAGGR_N, _K_RAGGR_K))
+        k_raggr_bt = float(np.interp(n_cavi_raggruppati_bt, _K_RAGGR_N, _K_RAGGR_K))
+        k_posa = _K_POSA.get(tipo_posa, 0.80)
 
         # Selezione cavi con verifiche
         I_mt_progetto = I_mt * 1.3
         I_bt_progetto = I_bt * 1.1
-        
-        # Cavo MT
-        cavo_mt_selezionato = None
-        for sezione, dati in cavi_mt_pro.items():
-            I_ammissibile = dati["portata_base"] * k_temp * k_raggr * k_posa
-            if I_ammissibile >= I_mt_progetto:
-                R_tot = dati["R"] * (lunghezza_mt / 1000)
-                X_tot = dati["X"] * (lunghezza_mt / 1000)
-                cos_phi = 0.85
-                sin_phi = math.sqrt(1 - cos_phi**2)
-                dV_perc = (math.sqrt(3) * I_mt * (R_tot * cos_phi + X_tot * sin_phi) * 100) / self.V_mt
-                
-                if dV_perc <= 0.5:
-                    perdite_kw = 3 * (I_mt**2) * R_tot / 1000
-                    cavo_mt_selezionato = {
-                        "sezione": sezione,
-                        "portata_corretta": I_ammissibile,
-                        "caduta_tensione_perc": dV_perc,
-                        "perdite_kw": perdite_kw,
-                        "R_ohm_km": dati["R"],
-                        "X_ohm_km": dati["X"],
-                        "verifica_portata": "✅ OK",
-                        "verifica_caduta": "✅ OK"
-                    }
-                    break
-
-        # Cavo BT
-        cavo_bt_selezionato = None
-        for sezione, dati in cavi_bt_pro.items():
-            I_ammissibile = dati["portata_base"] * k_temp * k_raggr_bt * k_posa
-            if I_ammissibile >= I_bt_progetto:
-                R_tot = dati["R"] * (lunghezza_bt / 1000)
-                X_tot = dati["X"] * (lunghezza_bt / 1000)
-                cos_phi = 0.85
-                sin_phi = math.sqrt(1 - cos_phi**2)
-                dV_perc = (math.sqrt(3) * I_bt * (R_tot * cos_phi + X_tot * sin_phi) * 100) / self.V_bt
-                
-                if dV_perc <= 4.0:
-                    perdite_kw = 3 * (I_bt**2) * R_tot / 1000
-                    cavo_bt_selezionato = {
-                        "sezione": sezione,
-                        "portata_corretta": I_ammissibile,
-                        "caduta_tensione_perc": dV_perc,
-                        "perdite_kw": perdite_kw,
-                        "R_ohm_km": dati["R"],
-                        "X_ohm_km": dati["X"],
-                        "verifica_portata": "✅ OK",
-                        "verifica_caduta": "✅ OK"
-                    }
-                    break
+
+        # Cavo MT (caduta max 0.5%) e cavo BT (caduta max 4%)
+        cavo_mt_selezionato = _seleziona_cavo(
+            _SEZIONI_MT, _R_MT, _X_MT, _PORTATE_BASE_MT, k_temp * k_raggr * k_posa,
+            lunghezza_mt / 1000, I_mt, I_mt_progetto, self.V_mt, 0.5)
+        cavo_bt_selezionato = _seleziona_cavo(
+            _SEZIONI_BT, _R_BT, _X_BT, _PORTATE_BASE_BT, k_temp * k_raggr_bt * k_posa,
+            lunghezza_bt / 1000, I_bt, I_bt_progetto, self.V_bt, 4.0)
 
         # Fallback se non trova cavi adatti
-        if not cavo_mt_selezionato:
-            cavo_mt_selezionato = {
-                "sezione": 500, "portata_corretta": 400, "caduta_tensione_perc": 0.8,
-                "perdite_kw": 1.0, "verifica_portata": "❌ NO", "verifica_caduta": "❌ NO"
-            }
-            
-        if not cavo_bt_selezionato:
-            cavo_bt_selezionato = {
-                "sezione": 630, "portata_corretta": 800, "caduta_tensione_perc": 2.0,
-                "perdite_kw": 1.5, "verifica_portata": "⚠️ LIMITE", "verifica_caduta": "⚠️ LIMITE"
-            }
+        if cavo_mt_selezionato is None:
+            cavo_mt_selezionato = CavoSelezionato(
+                sezione=500, portata_corretta=400, caduta_tensione_perc=0.8, perdite_kw=1.0,
+                verifica_portata=False, verifica_caduta=False
+            )
 
-        return {
-            "sez_mt": cavo_mt_selezionato["sezione"],
-            "sez_bt": cavo_bt_selezionato["sezione"],
-            "portata_mt": cavo_mt_selezionato["portata_corretta"],
-            "portata_bt": cavo_bt_selezionato["portata_corretta"],
-            "I_mt_richiesta": I_mt_progetto,
-            "I_bt_richiesta": I_bt_progetto,
-            "mt_dettaglio": cavo_mt_selezionato,
-            "bt_dettaglio": cavo_bt_selezionato,
-            "fattori_correzione": {
-                "k_temp": k_temp,
-                "k_raggr_mt": k_raggr,
-                "k_raggr_bt": k_raggr_bt,
-                "k_posa": k_posa,
-                "temp_ambiente": temp_ambiente,
-                "tipo_posa": tipo_posa,
-                "n_cavi_mt": n_cavi_raggruppati_mt,
-                "n_cavi_bt": n_cavi_raggruppati_bt
-            },
-            "perdite_totali_cavi_kw": cavo_mt_selezionato["perdite_kw"] + cavo_bt_selezionato["perdite_kw"]
-        }
+        if cavo_bt_selezionato is None:
+            cavo_bt_selezionato = CavoSelezionato(
+                sezione=630, portata_corretta=800, caduta_tensione_perc=2.0, perdite_kw=1.5,
+                verifica_portata=None, verifica_caduta=None
+            )
+
+        return SezioniCavi(mt=cavo_mt_selezionato, bt=cavo_bt_selezionato)
 
     def calcola_ventilazione(self, potenza_trasf, f_carico=0.8):
         """Calcola ventilazione con parametri fissi semplificati"""
@@ -1368,8 +1619,7 @@ class CabinaMTBT:
         temp_esterna = 32.0
         temp_interna = 45.0
     
-        Po = self.perdite_vuoto[potenza_trasf] / 1000
-        Pk = self.perdite_carico[potenza_trasf] / 1000
+        Po, Pk = _PERDITE_KW[potenza_trasf]
         perdite_totali = Po + Pk * (f_carico**2)
     
         rho_aria = 1.15
@@ -1423,8 +1673,7 @@ class CabinaMTBT:
 
     def calcola_rendimento(self, potenza_trasf, f_carico=0.8, cos_phi=0.95):
         """Calcola rendimento trasformatore"""
-        Po = self.perdite_vuoto[potenza_trasf] / 1000
-        Pk = self.perdite_carico[potenza_trasf] / 1000
+        Po, Pk = _PERDITE_KW[potenza_trasf]
         Pu = potenza_trasf * f_carico * cos_phi
         Pk_eff = Pk * (f_carico**2)
         eta = Pu / (Pu + Po + Pk_eff)
@@ -1461,21 +1710,8 @@ class CabinaMTBT:
 
     def calcola_illuminazione(self, area_locale=12, tipo_ambiente="Cabina MT/BT", apparecchio_led="36W Standard"):
         """Calcola illuminazione normale e emergenza"""
-        parametri_ambienti = {
-            "Cabina MT/BT": {"E_richiesto": 200, "descrizione": "Manutenzione generale"},
-            "Locale Quadri": {"E_richiesto": 500, "descrizione": "Lavori di precisione"},
-            "Corridoio": {"E_richiesto": 100, "descrizione": "Passaggio"},
-            "Deposito": {"E_richiesto": 150, "descrizione": "Magazzino"}
-        }
-        
-        apparecchi_led = {
-            "36W Standard": {"potenza": 36, "flusso": 4000, "costo": 65},
-            "54W Industriale": {"potenza": 54, "flusso": 6500, "costo": 125},
-            "24W Economy": {"potenza": 24, "flusso": 2800, "costo": 45}
-        }
-        
-        E_richiesto = parametri_ambienti[tipo_ambiente]["E_richiesto"]
-        led_data = apparecchi_led[apparecchio_led]
+        E_richiesto = _PARAMETRI_AMBIENTI[tipo_ambiente]["E_richiesto"]
+        led_data = _APPARECCHI_LED[apparecchio_led]
         
         Cu = 0.6
         Cm = 0.8
@@ -1516,20 +1752,33 @@ class CabinaMTBT:
 
     def calcola_cadute_tensione(self, I_mt, I_bt, lunghezza_mt=50, lunghezza_bt=30,
                                 sez_mt=120, sez_bt=185, cos_phi=0.85):
-        """Calcola cadute tensione MT e BT dettagliate"""
+        """
+        Calcola cadute tensione MT e BT dettagliate.
+        Correnti, lunghezze, sezioni e cos φ possono essere array NumPy (batch di linee):
+        in tal caso cadute e verifiche sono restituite elemento per elemento.
+        """
         rho_cu_70 = 0.0214
+        batch = any(np.ndim(v) for v in (I_mt, I_bt, lunghezza_mt, lunghezza_bt, sez_mt, sez_bt, cos_phi))
+        if batch:
+            I_mt, I_bt, lunghezza_mt, lunghezza_bt, sez_mt, sez_bt = (
+                np.asarray(v, dtype=np.float64)
+                for v in (I_mt, I_bt, lunghezza_mt, lunghezza_bt, sez_mt, sez_bt))
         
         R_mt = rho_cu_70 * lunghezza_mt / sez_mt
         X_mt = 0.08 * lunghezza_mt / 1000
-        sin_phi = math.sqrt(1 - cos_phi**2)
-        dV_mt_perc = (math.sqrt(3) * I_mt * (R_mt * cos_phi + X_mt * sin_phi) * 100) / self.V_mt
+        cos_phi, sin_phi = _cos_sin_phi(cos_phi)
+        dV_mt_perc = _caduta_tensione_perc(I_mt, R_mt, X_mt, self.V_mt, cos_phi, sin_phi)
         
         R_bt = rho_cu_70 * lunghezza_bt / sez_bt
         X_bt = 0.08 * lunghezza_bt / 1000
-        dV_bt_perc = (math.sqrt(3) * I_bt * (R_bt * cos_phi + X_bt * sin_phi) * 100) / self.V_bt
+        dV_bt_perc = _caduta_tensione_perc(I_bt, R_bt, X_bt, self.V_bt, cos_phi, sin_phi)
         
-        verifica_mt = "✅ OK" if dV_mt_perc <= 0.5 else "❌ SUPERATA"
-        verifica_bt = "✅ OK" if dV_bt_perc <= 4.0 else "❌ SUPERATA"
+        if batch:
+            verifica_mt = np.where(dV_mt_perc <= 0.5, "✅ OK", "❌ SUPERATA")
+            verifica_bt = np.where(dV_bt_perc <= 4.0, "✅ OK", "❌ SUPERATA")
+        else:
+            verifica_mt = "✅ OK" if dV_mt_perc <= 0.5 else "❌ SUPERATA"
+            verifica_bt = "✅ OK" if dV_bt_perc <= 4.0 else "❌ SUPERATA"
 
         return {
             "lunghezza_mt": lunghezza_mt,
@@ -1573,31 +1822,18 @@ class CabinaMTBT:
 
     def verifica_antincendio(self, potenza_trasf):
         """Verifica requisiti antincendio trasformatori"""
-        volumi_olio = {
-            25: 50, 50: 80, 100: 150, 160: 220, 250: 350, 315: 420, 400: 520,
-            500: 650, 630: 800, 800: 1000, 1000: 1200, 1250: 1500, 1600: 1900,
-            2000: 2300, 2500: 2800, 3150: 3400
-        }
-
-        volume_olio = volumi_olio.get(potenza_trasf, 1000)
+        volume_olio = _VOLUMI_OLIO.get(potenza_trasf, 1000)
         volume_m3 = volume_olio / 1000
         richiede_antincendio = volume_m3 > 1.0
 
         if richiede_antincendio:
-            prescrizioni = [
-                "Sistema rivelazione fumo/fiamma automatico",
-                "Sistema spegnimento automatico (CO₂ o polvere)",
+            prescrizioni = (
+                *_PRESCRIZIONI_IMPIANTI_ANTINCENDIO,
                 f"Vasca raccolta olio: {volume_olio * 1.1:.0f} litri (110% volume)",
-                "Separazione REI 120 da altri locali",
-                "Ventilazione meccanica forzata",
-                "Segnalazioni allarme in locale presidiato"
-            ]
+                *_PRESCRIZIONI_LOCALE_ANTINCENDIO
+            )
         else:
-            prescrizioni = [
-                "Solo estintori portatili",
-                "Ventilazione naturale sufficiente",
-                "Controllo periodico perdite olio"
-            ]
+            prescrizioni = _PRESCRIZIONI_SENZA_ANTINCENDIO
 
         return {
             "volume_olio": volume_olio,
@@ -1714,52 +1950,43 @@ class CabinaMTBT:
         # S = If * √t / K
         # K = 142 A√s/mm² per rame interrato
         K_termico = 142
-        sezione_anello = max(50, (If_terra * math.sqrt(t_eliminazione)) / K_termico)
+        sezione_anello = max(50, (If_terra * _RADICE_T_ELIMINAZIONE[t_eliminazione]) / K_termico)
         sezione_anello = round(sezione_anello, 0)
         
         # Resistenza anello perimetrale
-        raggio_equiv = math.sqrt(area_cabina / math.pi)
-        R_anello = resistivita_terreno / (2 * math.pi * raggio_equiv)
+        raggio_equiv = math.sqrt(area_cabina * _INV_PI)
+        R_anello = resistivita_terreno / (_DUE_PI * raggio_equiv)
         
         # Calcolo picchetti se necessario
+        lunghezza_picchetto = _LUNGHEZZA_PICCHETTO
         if R_anello > R_terra_max:
-            lunghezza_picchetto = 3.0
-            diametro_picchetto = 0.02
-            
-            # Resistenza singolo picchetto
-            R_picchetto = (resistivita_terreno / (2 * math.pi * lunghezza_picchetto)) * \
-                         math.log(4 * lunghezza_picchetto / diametro_picchetto)
+            # Resistenza singolo picchetto: ρ/(2πL) · ln(4L/d)
+            R_picchetto = resistivita_terreno * _R_PICCHETTO_UNITARIA
             
-            # Resistenza parallelo richiesta
-            R_parallelo_richiesta = 1 / (1 / R_terra_max - 1 / R_anello)
+            # Resistenza parallelo richiesta: R tale che R ∥ R_anello = R_terra_max
+            R_parallelo_richiesta = (R_terra_max * R_anello) / (R_anello - R_terra_max)
             
             # Numero picchetti (con coefficiente mutuo 0.7)
             n_picchetti = max(2, math.ceil(R_picchetto / (R_parallelo_richiesta * 0.7)))
             
             # Resistenza sistema picchetti
             R_picchetti = R_picchetto / (n_picchetti * 0.7)
-            
-            # Resistenza totale
-            R_terra_totale = 1 / (1 / R_anello + 1 / R_picchetti)
         else:
             # Solo anello perimetrale
             n_picchetti = 2  # Picchetti minimi
-            lunghezza_picchetto = 3.0
-            R_picchetti = resistivita_terreno / (4 * math.pi * lunghezza_picchetto)
-            R_terra_totale = 1 / (1 / R_anello + 1 / R_picchetti)
+            R_picchetti = resistivita_terreno * _R_PICCHETTI_MIN_UNITARIA
+
+        # Resistenza totale: anello in parallelo ai picchetti
+        R_terra_totale = (R_anello * R_picchetti) / (R_anello + R_picchetti)
 
         # Verifiche di sicurezza
         U_terra = If_terra * R_terra_totale
         
-        # Coefficiente di forma per la distribuzione del potenziale
-        K_forma = 1 / math.sqrt(area_cabina / (math.pi * raggio_equiv**2))
-        
-        # Gradiente superficiale massimo
-        gradiente_superficie = (If_terra * resistivita_terreno * K_forma) / (2 * math.pi * area_cabina)
-        
-        # Tensioni di sicurezza
-        U_passo_eff = gradiente_superficie * 0.8  # Passo 0.8m
-        U_contatto_eff = U_terra * 0.3  # Coefficiente riduttivo
+        # Tensioni di sicurezza: gradiente superficiale massimo ρ·If·K_forma/(2π·A) sul
+        # passo di 0.8 m; K_forma = 1 perché il raggio del cerchio equivalente dà
+        # π·r² = area cabina
+        U_passo_eff = _K_PASSO * If_terra * resistivita_terreno / area_cabina
+        U_contatto_eff = U_terra * _K_CONTATTO
         
         # Verifiche
         verifica_resistenza = "✅ OK" if R_terra_totale <= R_terra_max else "❌ NON OK"
@@ -1767,86 +1994,136 @@ class CabinaMTBT:
         verifica_contatto = "✅ OK" if U_contatto_eff <= U_contatto_max else "❌ NON OK"
         
         # Sezioni conduttori equipotenziali
-        if sezione_anello <= 16:
-            sezione_pe_principale = sezione_anello
-        elif sezione_anello <= 35:
-            sezione_pe_principale = 16
-        else:
-            sezione_pe_principale = sezione_anello / 2
-
-        sezione_pe_masse = max(6, sezione_pe_principale / 2)
+        sezione_pe_principale, sezione_pe_masse = _sezioni_pe(sezione_anello)
         
         # Protezione catodica
         protezione_catodica = resistivita_terreno > 200 or R_terra_totale > 0.8
         
-        return {
+        return ImpiantoTerra(
             # Parametri calcolo
-            "resistivita_terreno": resistivita_terreno,
-            "lunghezza_linea_aerea_km": lunghezza_linea_aerea,
-            "lunghezza_linea_cavo_km": lunghezza_linea_cavo,
-            "tensione_rete_kv": tensione_rete,
+            resistivita_terreno=resistivita_terreno,
+            lunghezza_linea_aerea_km=lunghezza_linea_aerea,
+            lunghezza_linea_cavo_km=lunghezza_linea_cavo,
+            tensione_rete_kv=tensione_rete,
             
             # Corrente di guasto
-            "corrente_guasto_cei": If_terra_cei,
-            "corrente_guasto_effettiva": If_terra,
-            "metodo_calcolo": "CEI 11-1: IF = (0,003⋅L1 + 0,2⋅L2)⋅U",
+            corrente_guasto_cei=If_terra_cei,
+            corrente_guasto_effettiva=If_terra,
+            metodo_calcolo="CEI 11-1: IF = (0,003⋅L1 + 0,2⋅L2)⋅U",
             
             # Dimensioni cabina
-            "dimensioni_cabina": f"{lunghezza_cabina}×{larghezza_cabina} m",
-            "area_cabina": area_cabina,
-            "perimetro": perimetro,
+            dimensioni_cabina=f"{lunghezza_cabina}×{larghezza_cabina} m",
+            area_cabina=area_cabina,
+            perimetro=perimetro,
             
             # Dispersore
-            "sezione_anello": sezione_anello,
-            "resistenza_anello": R_anello,
-            "n_picchetti": n_picchetti,
-            "lunghezza_picchetti": lunghezza_picchetto,
-            "resistenza_picchetti": R_picchetti,
-            "resistenza_totale": R_terra_totale,
+            sezione_anello=sezione_anello,
+            resistenza_anello=R_anello,
+            n_picchetti=n_picchetti,
+            lunghezza_picchetti=lunghezza_picchetto,
+            resistenza_picchetti=R_picchetti,
+            resistenza_totale=R_terra_totale,
             
             # Tensioni di sicurezza
-            "tensione_terra": U_terra,
-            "tensione_passo_effettiva": U_passo_eff,
-            "tensione_contatto_effettiva": U_contatto_eff,
+            tensione_terra=U_terra,
+            tensione_passo_effettiva=U_passo_eff,
+            tensione_contatto_effettiva=U_contatto_eff,
             
             # Verifiche
-            "verifica_resistenza": verifica_resistenza,
-            "verifica_passo": verifica_passo,
-            "verifica_contatto": verifica_contatto,
+            verifica_resistenza=verifica_resistenza,
+            verifica_passo=verifica_passo,
+            verifica_contatto=verifica_contatto,
             
             # Conduttori equipotenziali
-            "sezione_pe_principale": sezione_pe_principale,
-            "sezione_pe_masse": sezione_pe_masse,
-            "protezione_catodica_richiesta": protezione_catodica,
+            sezione_pe_principale=sezione_pe_principale,
+            sezione_pe_masse=sezione_pe_masse,
+            protezione_catodica_richiesta=protezione_catodica,
             
             # Note tecniche
-            "note": [
+            note=(
                 f"Corrente guasto CEI 11-1: {If_terra:.1f}A",
                 f"Resistenza terra: {R_terra_totale:.2f}Ω {'(conforme)' if R_terra_totale <= 1.0 else '(richiede miglioramenti)'}",
                 f"Anello {sezione_anello}mm² + {n_picchetti} picchetti da {lunghezza_picchetto}m",
                 f"Formula: IF = (0,003×{lunghezza_linea_aerea} + 0,2×{lunghezza_linea_cavo})×{tensione_rete} = {If_terra_cei:.1f}A",
                 "Verifiche secondo CEI 11-1 ed EN 50522"
-            ]
-        }
+            )
+        )
 
 # Funzione per validare parametri terra
 def valida_parametri_terra(lunghezza_aerea, lunghezza_cavo, tensione_rete):
     """Validazione parametri impianto terra"""
-    errori = []
-    
-    if lunghezza_aerea + lunghezza_cavo == 0:
-        errori.append("Almeno una delle due lunghezze deve essere > 0")
-    
-    if lunghezza_aerea > 20:
-        errori.append("Lunghezza aerea eccessiva (max 20 km)")
-    
-    if lunghezza_cavo > 5:
-        errori.append("Lunghezza cavo eccessiva (max 5 km)")
-    
-    if tensione_rete not in [15, 20, 30]:
-        errori.append("Tensione rete non standard")
-    
-    return errori
+    controlli = (
+        (lunghezza_aerea + lunghezza_cavo == 0, "Almeno una delle due lunghezze deve essere > 0"),
+        (lunghezza_aerea > 20, "Lunghezza aerea eccessiva (max 20 km)"),
+        (lunghezza_cavo > 5, "Lunghezza cavo eccessiva (max 5 km)"),
+        (tensione_rete not in (15, 20, 30), "Tensione rete non standard")
+    )
+    return [messaggio for violato, messaggio in controlli if violato]
+
+# Stili PDF costruiti una sola volta per processo. reportlab viene importato solo
+# dalle funzioni del report, così l'avvio dell'app non ne paga il caricamento
+@st.cache_resource
+def init_stili_pdf():
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=30, alignment=1))
+    styles.add(ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=12, spaceAfter=12, textColor=colors.darkblue))
+    styles.add(ParagraphStyle('RaccomandazioneStyle', parent=styles['Heading2'], fontSize=13, spaceAfter=15, textColor=colors.darkgreen))
+    styles.add(ParagraphStyle('CompanyName', parent=styles['Normal'], fontSize=14, spaceAfter=15,
+                              alignment=1, textColor=colors.darkblue, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle('SolRacc', parent=styles['Heading3'], textColor=colors.darkgreen))
+    styles.add(ParagraphStyle('Finale', parent=styles['Normal'], textColor=colors.darkred, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle('SubHeading', parent=styles['Heading3'], fontSize=11, textColor=colors.darkblue))
+    styles.add(ParagraphStyle('BeneficiUcc', parent=styles['Heading3'], textColor=colors.darkgreen))
+    return styles
+
+# Stili delle tabelle del report: intestazione colorata, righe evidenziate e griglia
+@st.cache_resource
+def init_stili_tabelle_pdf():
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+
+    def intestazione(sfondo, allineamento="LEFT"):
+        return [
+            ('BACKGROUND', (0, 0), (-1, 0), sfondo),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), allineamento),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12)
+        ]
+    griglia = ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    return {
+        "elettrici": TableStyle(intestazione(colors.grey) + [
+            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgreen),  # Evidenzia Ucc 8%
+            griglia
+        ]),
+        "trasformatore": TableStyle(intestazione(colors.grey) + [
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('BACKGROUND', (0, 3), (-1, 3), colors.lightgreen),  # Evidenzia Ucc 8%
+            griglia
+        ]),
+        "matrice": TableStyle(intestazione(colors.darkblue, 'CENTER') + [
+            ('BACKGROUND', (0, 1), (-1, 1), colors.lightgreen),  # Evidenzia raccomandato
+            ('BACKGROUND', (0, 2), (-1, -1), colors.lightgrey),
+            griglia
+        ]),
+        "terra": TableStyle(intestazione(colors.darkgreen) + [
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
+            griglia
+        ])
+    }
+
+def _aggiungi_tabella(story, dati, larghezze, stile, spazio=20):
+    """Aggiunge al report una tabella con lo stile indicato seguita da uno spazio verticale"""
+    from reportlab.platypus import Table, Spacer
+
+    tabella = Table(dati, colWidths=larghezze)
+    tabella.setStyle(stile)
+    story.extend((tabella, Spacer(1, spazio)))
 
 # Funzione per generare PDF report con raccomandazioni ingegneristiche
 def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, cos_phi, margine,
@@ -1854,26 +2131,28 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
                       prot_mt, prot_bt, cavi, ventilazione, rendimento, calc,
                       isolamento, illuminazione, cadute_tensione, scaricatori,
                       antincendio, regime_neutro, verifiche_costruttive,
-                      impianto_terra, raccomandazioni):
-    """Genera report PDF completo con raccomandazioni ingegneristiche"""
+                      impianto_terra, raccomandazioni, data_report=None):
+    """Genera report PDF completo con raccomandazioni ingegneristiche (data_report: default adesso)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
     
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
     
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=30, alignment=1)
-    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=12, spaceAfter=12, textColor=colors.darkblue)
-    raccomandazione_style = ParagraphStyle('RaccomandazioneStyle', parent=styles['Heading2'], fontSize=13, spaceAfter=15, textColor=colors.darkgreen)
+    styles = init_stili_pdf()
+    stili_tabelle = init_stili_tabelle_pdf()
+    title_style = styles['CustomTitle']
+    heading_style = styles['CustomHeading']
+    raccomandazione_style = styles['RaccomandazioneStyle']
     
     story = []
     
     # Titolo
     story.append(Paragraph("REPORT DIMENSIONAMENTO CABINA MT/BT - v2.2", title_style))
-    story.append(Paragraph("MAURIZIO SRL - Impianti Elettrici", 
-                          ParagraphStyle('CompanyName', parent=styles['Normal'], fontSize=14, spaceAfter=15,
-                                        alignment=1, textColor=colors.darkblue, fontName='Helvetica-Bold')))
+    story.append(Paragraph("MAURIZIO SRL - Impianti Elettrici", styles['CompanyName']))
     story.append(Paragraph(f"Cabina 20kV/400V - {potenza_trasf} kVA - Ucc 8%", styles['Heading3']))
-    story.append(Paragraph(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Paragraph(f"Data: {(data_report or datetime.now()).strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
     story.append(Spacer(1, 20))
 
     # 🏆 SEZIONE RACCOMANDAZIONI INGEGNERISTICHE
@@ -1881,8 +2160,7 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
     
     # Soluzione raccomandata
     rec = raccomandazioni['soluzione_raccomandata']
-    story.append(Paragraph(f"<b>{rec['priorita']}: {rec['nome']}</b>", 
-                          ParagraphStyle('SolRacc', parent=styles['Heading3'], textColor=colors.darkgreen)))
+    story.append(Paragraph(f"<b>{rec['priorita']}: {rec['nome']}</b>", styles['SolRacc']))
     
     story.append(Paragraph(f"<b>Filosofia:</b> {rec['filosofia']}", styles['Normal']))
     story.append(Paragraph(f"<b>Descrizione:</b> {rec['descrizione']}", styles['Normal']))
@@ -1897,8 +2175,7 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
     
     # Raccomandazione finale
     finale = raccomandazioni['raccomandazione_finale']
-    story.append(Paragraph(f"<b>🎯 RACCOMANDAZIONE FINALE: {finale['scelta']}</b>", 
-                          ParagraphStyle('Finale', parent=styles['Normal'], textColor=colors.darkred, fontName='Helvetica-Bold')))
+    story.append(Paragraph(f"<b>🎯 RACCOMANDAZIONE FINALE: {finale['scelta']}</b>", styles['Finale']))
     story.append(Paragraph(f"<b>Motivazione:</b> {finale['motivazione']}", styles['Normal']))
     story.append(Paragraph(f"<b>Implementazione:</b> {finale['implementazione']}", styles['Normal']))
     
@@ -1908,7 +2185,7 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
     story.append(Paragraph("DATI DI INPUT E PARAMETRI DI PROGETTO", heading_style))
 
     # Sezione 1: Dati elettrici base con Ucc 8%
-    story.append(Paragraph("Dati Elettrici Base - Trasformatori Ucc 8%", ParagraphStyle('SubHeading', parent=styles['Heading3'], fontSize=11, textColor=colors.darkblue)))
+    story.append(Paragraph("Dati Elettrici Base - Trasformatori Ucc 8%", styles['SubHeading']))
     data_elettrici = [
         ["Parametro", "Valore", "Unità"],
         ["Potenza carichi totali", f"{potenza_carichi}", "kW/kVA"],
@@ -1920,20 +2197,7 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
         ["Tensione cortocircuito (Ucc)", "8%", "NUOVO STANDARD"]
     ]
 
-    table = Table(data_elettrici, colWidths=[6*cm, 4*cm, 2*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgreen),  # Evidenzia Ucc 8%
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 15))
+    _aggiungi_tabella(story, data_elettrici, [6*cm, 4*cm, 2*cm], stili_tabelle['elettrici'], spazio=15)
 
     # Trasformatore con specifica Ucc 8%
     story.append(Paragraph("TRASFORMATORE SELEZIONATO - Ucc 8%", heading_style))
@@ -1942,29 +2206,15 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
         ["Potenza nominale", f"{potenza_trasf} kVA"],
         ["Collegamento", "Dyn11"],
         ["Tensione cortocircuito", "8% (OTTIMIZZATA per selettività)"],
-        ["Perdite a vuoto (AAo)", f"{calc.perdite_vuoto[potenza_trasf]} W"],
-        ["Perdite a carico (Bk)", f"{calc.perdite_carico[potenza_trasf]} W"],
+        ["Perdite a vuoto (AAo)", f"{_PERDITE_VUOTO[potenza_trasf]} W"],
+        ["Perdite a carico (Bk)", f"{_PERDITE_CARICO[potenza_trasf]} W"],
         ["Tipo raccomandato", "Cast Resin per sicurezza e affidabilità"]
     ]
 
-    table = Table(data_trasf, colWidths=[8*cm, 4*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('BACKGROUND', (0, 3), (-1, 3), colors.lightgreen),  # Evidenzia Ucc 8%
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
+    _aggiungi_tabella(story, data_trasf, [8*cm, 4*cm], stili_tabelle['trasformatore'])
 
     # Note sui benefici Ucc 8%
-    story.append(Paragraph("🎯 BENEFICI TRASFORMATORI Ucc 8%", 
-                          ParagraphStyle('BeneficiUcc', parent=styles['Heading3'], textColor=colors.darkgreen)))
+    story.append(Paragraph("🎯 BENEFICI TRASFORMATORI Ucc 8%", styles['BeneficiUcc']))
     
     benefici_text = """
     • <b>Icc BT ridotta</b>: Cortocircuito BT più basso = componenti meno sollecitati<br/>
@@ -1987,20 +2237,7 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
         ["Solo BT Selettivi", scores["Solo BT Sel"], "Budget limitato"]
     ]
 
-    table = Table(data_scores, colWidths=[6*cm, 3*cm, 3*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.lightgreen),  # Evidenzia raccomandato
-        ('BACKGROUND', (0, 2), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
+    _aggiungi_tabella(story, data_scores, [6*cm, 3*cm, 3*cm], stili_tabelle['matrice'])
 
     # Resto del report standard...
     # [Include tutti gli altri calcoli come nel report originale]
@@ -2011,27 +2248,15 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
     terra = impianto_terra
     data_terra = [
         ["Parametro", "Valore", "Unità"],
-        ["Corrente guasto (CEI 11-1)", f"{terra['corrente_guasto_effettiva']:.1f}", "A"],
-        ["Resistenza totale", f"{terra['resistenza_totale']:.2f}", "Ω"],
-        ["Anello perimetrale", f"{terra['sezione_anello']:.0f}", "mm²"],
-        ["N° picchetti", f"{terra['n_picchetti']} × {terra['lunghezza_picchetti']}m", ""],
-        ["Verifica resistenza", terra['verifica_resistenza'], ""],
-        ["Verifica tensioni", f"{terra['verifica_passo']} / {terra['verifica_contatto']}", "Passo/Contatto"]
+        ["Corrente guasto (CEI 11-1)", f"{terra.corrente_guasto_effettiva:.1f}", "A"],
+        ["Resistenza totale", f"{terra.resistenza_totale:.2f}", "Ω"],
+        ["Anello perimetrale", f"{terra.sezione_anello:.0f}", "mm²"],
+        ["N° picchetti", f"{terra.n_picchetti} × {terra.lunghezza_picchetti}m", ""],
+        ["Verifica resistenza", terra.verifica_resistenza, ""],
+        ["Verifica tensioni", f"{terra.verifica_passo} / {terra.verifica_contatto}", "Passo/Contatto"]
     ]
 
-    table = Table(data_terra, colWidths=[6*cm, 4*cm, 2*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
+    _aggiungi_tabella(story, data_terra, [6*cm, 4*cm, 2*cm], stili_tabelle['terra'])
 
     # Footer con note importanti
     story.append(Paragraph("📋 NOTE IMPORTANTI DEL PROGETTISTA", heading_style))
@@ -2055,14 +2280,141 @@ def genera_pdf_report_con_raccomandazioni(potenza_carichi, f_contemporaneita, co
 
     # Genera PDF
     doc.build(story)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
+
+# Elemento Streamlit per livello di valutazione selettività
+_RENDER_VALUTAZIONE = {"ok": st.success, "warn": st.warning, "err": st.error}
+
+
+def formatta_taratura(valore, unita, tempo=None):
+    """Testo di una taratura relè, es. '12.5 A, t=0.4s'"""
+    testo = f"{valore:.1f} {unita}"
+    return f"{testo}, t={tempo}s" if tempo is not None else testo
 
 # Inizializza la classe
 @st.cache_resource
 def init_calculator():
     return CabinaMTBT()
 
+# Calcoli puri memorizzati sugli input scalari: il calcolatore è un singleton
+# di processo (init_calculator) e viene passato come "_calc" per non farne l'hash
+@st.cache_data(show_spinner=False, max_entries=128)
+def memo_sezioni_cavi(_calc, I_mt, I_bt, lunghezza_mt, lunghezza_bt, temp_ambiente,
+                      tipo_posa, n_cavi_raggruppati_mt, n_cavi_raggruppati_bt):
+    return _calc.calcola_sezioni_cavi_professionale(
+        I_mt, I_bt, lunghezza_mt, lunghezza_bt, temp_ambiente,
+        tipo_posa, n_cavi_raggruppati_mt, n_cavi_raggruppati_bt)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def memo_cortocircuito_bt(_calc, potenza_trasf, cavi_bt_sezione, lunghezza_bt):
+    return _calc.calcola_cortocircuito_bt_completo(potenza_trasf, cavi_bt_sezione, lunghezza_bt)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def memo_protezioni_mt(_calc, I_mt):
+    return _calc.dimensiona_protezioni_mt(I_mt)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def memo_protezioni_bt(_calc, I_bt, Icc_bt):
+    return _calc.dimensiona_protezioni_bt(I_bt, Icc_bt)
+
+# PDF memorizzato in memoria per calcolo: i risultati dipendono solo dalla tupla
+# input_calcolo e la data del report è quella del calcolo (fissata da CALCOLA),
+# quindi la chiave resta stabile finché il calcolo non cambia; la cache si svuota
+# a ogni riavvio, così un aggiornamento del codice non riusa report generati dalla
+# versione precedente; i dizionari con prefisso "_" non vengono esaminati da Streamlit
+@st.cache_data(show_spinner=False, max_entries=16)
+def genera_pdf_memorizzato(input_calcolo, data_report, _r, _calc):
+    p = _r['parametri_input']
+    return genera_pdf_report_con_raccomandazioni(
+        p['potenza_carichi'], p['f_contemporaneita'], p['cos_phi'], p['margine'],
+        _r['potenza_trasf'], _r['potenza_necessaria'], _r['I_mt'], _r['I_bt'], _r['Icc_bt'],
+        _r['prot_mt'], _r['prot_bt'], _r['cavi'], _r['ventilazione'], _r['rendimento'],
+        _calc, _r['isolamento'], _r['illuminazione'], _r['cadute_tensione'],
+        _r['scaricatori'], _r['antincendio'], _r['regime_neutro'],
+        _r['verifiche_costruttive'], _r['impianto_terra'], _r['raccomandazioni'],
+        data_report
+    )
+
+# Tabelle della sezione impianto di terra memorizzate sul risultato ImpiantoTerra:
+# a ogni rerun dell'interfaccia si riusano i DataFrame già formattati
+@st.cache_data(show_spinner=False, max_entries=16)
+def tabelle_impianto_terra(terra):
+    df_corrente = pd.DataFrame({
+        "Parametro": _PARAMETRI_CORRENTE_GUASTO,
+        "Valore": [
+            f"{terra.corrente_guasto_cei:.1f} A",
+            f"{terra.corrente_guasto_effettiva:.1f} A",
+            "CEI 11-1",
+            "0.5 s"
+        ]
+    })
+
+    df_disp = pd.DataFrame({
+        "Parametro": _PARAMETRI_DISPERSORE,
+        "Valore": [
+            terra.dimensioni_cabina,
+            f"{terra.sezione_anello:.0f} mm²",
+            f"{terra.n_picchetti} × {terra.lunghezza_picchetti}m",
+            f"{terra.resistenza_totale:.2f} Ω"
+        ]
+    })
+
+    df_sicur = pd.DataFrame({
+        "Verifica": _VERIFICHE_SICUREZZA,
+        "Valore Effettivo": [
+            f"{terra.resistenza_totale:.2f} Ω",
+            f"{terra.tensione_passo_effettiva:.1f} V",
+            f"{terra.tensione_contatto_effettiva:.1f} V",
+            f"{terra.tensione_terra:.1f} V"
+        ],
+        "Limite": [
+            "≤ 1.0 Ω",
+            "≤ 50 V",
+            "≤ 25 V", 
+            "N/A"
+        ],
+        "Esito": pd.Categorical([
+            terra.verifica_resistenza,
+            terra.verifica_passo,
+            terra.verifica_contatto,
+            "---"
+        ])
+    })
+
+    df_cond = pd.DataFrame({
+        "Conduttore": _CONDUTTORI_TERRA,
+        "Sezione": [
+            f"{terra.sezione_anello:.0f} mm²",
+            f"{terra.sezione_pe_principale:.0f} mm²",
+            f"{terra.sezione_pe_masse:.0f} mm²"
+        ]
+    })
+    return df_corrente, df_disp, df_sicur, df_cond
+
+# Sezione report PDF come fragment: i click su genera/scarica rieseguono
+# solo questa sezione invece di ridisegnare tutti i risultati
+@st.fragment
+def sezione_report_pdf(r, input_calcolo, data_report):
+    if st.button("📄 GENERA REPORT PDF CON RACCOMANDAZIONI", type="primary", use_container_width=True):
+        try:
+            # Data del calcolo: la stessa per il contenuto del PDF e il nome file
+            pdf_bytes = genera_pdf_memorizzato(input_calcolo, data_report, r, calc)
+
+            filename = f"Cabina_MT_BT_{r['potenza_trasf']}kVA_Ucc8_Raccomandazioni_{data_report.strftime('%Y%m%d_%H%M')}.pdf"
+
+            st.download_button(
+                label="⬇️ Scarica Report PDF con Raccomandazioni",
+                data=pdf_bytes,
+                file_name=filename,
+                mime="application/pdf",
+                use_container_width=True
+            )
+
+            st.toast("Report PDF con raccomandazioni ingegneristiche generato con successo!", icon="✅")
+
+        except Exception as e:
+            st.error(f"❌ Errore nella generazione del PDF: {str(e)}")
+
 # Header principale
 st.title("Calcolatore Cabina MT/BT - Maurizio v3.0")
 st.markdown("**Dimensionamento automatico cabine 20kV/400V secondo normative CEI**")
@@ -2086,6 +2438,10 @@ if 'calcoli_effettuati' not in st.session_state:
     st.session_state.calcoli_effettuati = False
 if 'risultati_completi' not in st.session_state:
     st.session_state.risultati_completi = {}
+if 'input_calcolo' not in st.session_state:
+    st.session_state.input_calcolo = None
+if 'data_calcolo' not in st.session_state:
+    st.session_state.data_calcolo = None
 
 # ============== SIDEBAR PER INPUT ==============
 st.sidebar.header("Parametri di Input")
@@ -2146,20 +2502,11 @@ st.sidebar.subheader("Parametri Terreno")
 
 resistivita_terreno = st.sidebar.selectbox(
     "Resistività Terreno (Ω⋅m)",
-    options=[30, 50, 70, 100, 150, 200, 300],
+    options=tuple(_DESCRIZIONI_TERRENO),
     index=3,  # Default 100
     help="Resistività del terreno secondo CEI 11-1")
 
-terreno_desc = {
-    30: "Terreno umido/argilloso",
-    50: "Terreno misto umido", 
-    70: "Terreno normale trattato",
-    100: "Terreno medio standard",
-    150: "Terreno asciutto/sabbioso",
-    200: "Terreno difficile",
-    300: "Terreno roccioso/arido"
-}
-st.sidebar.text(f"{terreno_desc[resistivita_terreno]}")
+st.sidebar.text(_DESCRIZIONI_TERRENO[resistivita_terreno])
 
 # Parametri Linea MT per calcolo If
 st.sidebar.subheader("Parametri Linea MT")
@@ -2263,6 +2610,8 @@ if st.session_state.get('show_confirm_reset', False):
         if st.button("SÌ", key="confirm_yes", use_container_width=True):
             st.session_state.calcoli_effettuati = False
             st.session_state.risultati_completi = {}
+            st.session_state.input_calcolo = None
+            st.session_state.data_calcolo = None
             st.session_state.show_confirm_reset = False
             st.sidebar.success("Dimensionamento azzerato!")
             st.rerun()
@@ -2279,12 +2628,22 @@ st.sidebar.markdown("Maurizio srl - Secondo normative CEI")
 
 # ============== LOGICA CALCOLI CON UCC 8% ==============
 if calcola_button:
+    # Ingressi che determinano i risultati: se invariati rispetto all'ultimo calcolo si
+    # riusano i risultati; la stessa tupla è la chiave del PDF memorizzato
+    input_calcolo = (
+        potenza_carichi, tipo_potenza, produttore, f_contemporaneita, cos_phi, margine,
+        resistivita_terreno, lunghezza_mt, lunghezza_bt, temp_ambiente, tipo_posa,
+        n_cavi_mt, n_cavi_bt, lunghezza_aerea, lunghezza_cavo_mt, tensione_rete,
+        lunghezza_cabina, larghezza_cabina
+    )
+
     # Validazione parametri terra
     errori = valida_parametri_terra(lunghezza_aerea, lunghezza_cavo_mt, tensione_rete)
     if errori:
         st.error("❌ Errori nei parametri:")
-        for errore in errori:
-            st.write(f"• {errore}")
+        st.markdown("  \n".join(f"• {errore}" for errore in errori))
+    elif st.session_state.risultati_completi and st.session_state.input_calcolo == input_calcolo:
+        st.info("Parametri invariati: risultati già aggiornati")
     else:
         st.session_state.calcoli_effettuati = True
         
@@ -2314,33 +2673,33 @@ if calcola_button:
         status_text.text("Calcolo cavi...")
         progress_bar.progress(30)
         
-        cavi = calc.calcola_sezioni_cavi_professionale(
-            I_mt, I_bt, lunghezza_mt, lunghezza_bt, temp_ambiente, 
+        cavi = memo_sezioni_cavi(
+            calc, I_mt, I_bt, lunghezza_mt, lunghezza_bt, temp_ambiente, 
             tipo_posa, n_cavi_mt, n_cavi_bt)
         
         status_text.text("Calcolo cortocircuito con Ucc 8%...")
         progress_bar.progress(40)
         
         # Cortocircuito con impedenza cavi e Ucc 8%
-        cortocircuito_bt = calc.calcola_cortocircuito_bt_completo(
-            potenza_trasf, cavi['sez_bt'], lunghezza_bt)
+        cortocircuito_bt = memo_cortocircuito_bt(
+            calc, potenza_trasf, cavi.bt.sezione, lunghezza_bt)
         Icc_bt = cortocircuito_bt['Icc_bt']
         
         status_text.text("Dimensionamento protezioni...")
         progress_bar.progress(50)
         
         # Protezioni MT
-        prot_mt = calc.dimensiona_protezioni_mt(I_mt)
-        prot_bt = calc.dimensiona_protezioni_bt(I_bt, Icc_bt)
+        prot_mt = memo_protezioni_mt(calc, I_mt)
+        prot_bt = memo_protezioni_bt(calc, I_bt, Icc_bt)
         
         status_text.text("Verifiche termiche cavi...")
         progress_bar.progress(60)
         
         # Verifiche termiche
         verifica_termica_mt = calc.verifica_termica_cavi(
-            cavi['sez_mt'], I_mt * 20, 0.1, "MT")  # CC istantaneo MT
+            cavi.mt.sezione, I_mt * 20, 0.1, "MT")  # CC istantaneo MT
         verifica_termica_bt = calc.verifica_termica_cavi(
-            cavi['sez_bt'], Icc_bt, 0.01, "BT")  # CC BT
+            cavi.bt.sezione, Icc_bt, 0.01, "BT")  # CC BT
         
         status_text.text("Verifica selettività con Ucc 8%...")
         progress_bar.progress(70)
@@ -2374,8 +2733,8 @@ if calcola_button:
         isolamento = calc.calcola_caratteristiche_isolamento(potenza_trasf)
         illuminazione = calc.calcola_illuminazione(area_locale=24)
         cadute_tensione = calc.calcola_cadute_tensione(I_mt, I_bt, 
-                                                       sez_mt=cavi['sez_mt'], 
-                                                       sez_bt=cavi['sez_bt'])
+                                                       sez_mt=cavi.mt.sezione, 
+                                                       sez_bt=cavi.bt.sezione)
         scaricatori = calc.dimensiona_scaricatori()
         antincendio = calc.verifica_antincendio(potenza_trasf)
         regime_neutro = calc.calcola_regime_neutro(potenza_trasf)
@@ -2393,8 +2752,8 @@ if calcola_button:
         )
         
         # CALCOLO CAMPI ELETTROMAGNETICI CON FORMULA UFFICIALE
-        dpa_mt = calc.calcola_dpa(I_mt, cavi['sez_mt'], "MT")
-        dpa_bt = calc.calcola_dpa(I_bt, cavi['sez_bt'], "BT")
+        dpa_mt = calc.calcola_dpa(I_mt, cavi.mt.sezione, "MT")
+        dpa_bt = calc.calcola_dpa(I_bt, cavi.bt.sezione, "BT")
 
         campi_elettromagnetici = {
             'dpa_mt': dpa_mt,
@@ -2454,6 +2813,10 @@ if calcola_button:
             }
         }
         
+        st.session_state.input_calcolo = input_calcolo
+        # Data del calcolo al minuto, come stampata nel report
+        st.session_state.data_calcolo = datetime.now().replace(second=0, microsecond=0)
+        
         # Rimuovi progress bar
         progress_bar.empty()
         status_text.empty()
@@ -2533,10 +2896,10 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
         
     with col3:
         st.metric("Cortocircuito BT", f"{r['Icc_bt']/1000:.1f} kA")
-        st.metric("Cavo MT", f"{r['cavi']['sez_mt']} mm²")
+        st.metric("Cavo MT", f"{r['cavi'].mt.sezione} mm²")
         
     with col4:
-        st.metric("Cavo BT", f"{r['cavi']['sez_bt']} mm²")
+        st.metric("Cavo BT", f"{r['cavi'].bt.sezione} mm²")
         st.metric("Rendimento", f"{r['rendimento']['rendimento']:.1f}%")
     
     # Benefici Ucc 8%
@@ -2616,25 +2979,27 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
     
     # =================== SEZIONE PROTEZIONI ===================
     st.markdown("## Sistemi di Protezione")
+
+    prot_mt, prot_bt = r['prot_mt'], r['prot_bt']
     
     col_prot1, col_prot2 = st.columns(2)
     
     with col_prot1:
         st.markdown("### Protezioni MT (SPGI)")
-        st.info(f"**Interruttore SF6:** {r['prot_mt']['interruttore']}")
-        st.write(f"**TA Protezione:** {r['prot_mt']['ta_protezione']}")
-        st.write(f"**TV Misure:** {r['prot_mt']['tv_misure']}")
-        st.write(f"**Scaricatori:** {r['prot_mt']['scaricatori']}")
+        st.info(f"**Interruttore SF6:** {prot_mt['interruttore']}")
+        st.write(f"**TA Protezione:** {prot_mt['ta_protezione']}")
+        st.write(f"**TV Misure:** {prot_mt['tv_misure']}")
+        st.write(f"**Scaricatori:** {prot_mt['scaricatori']}")
         
         st.markdown("**Tarature Relè:**")
-        for func, tar in r['prot_mt']['tarature'].items():
-            st.write(f"• **{func}:** {tar}")
+        st.markdown("  \n".join(
+            f"• **{func}:** {formatta_taratura(*tar)}" for func, tar in prot_mt['tarature'].items()))
     
     with col_prot2:
         st.markdown("### Protezioni BT")
-        st.info(f"**Interruttore Generale:** {r['prot_bt']['interruttore_generale']}")
-        st.write(f"**Differenziale:** {r['prot_bt']['differenziale']}")
-        st.write(f"**Icc Secondario:** {r['prot_bt']['icc_bt']:.1f} kA")
+        st.info(f"**Interruttore Generale:** {prot_bt['interruttore_generale']}")
+        st.write(f"**Differenziale:** {prot_bt['differenziale']}")
+        st.write(f"**Icc Secondario:** {prot_bt['icc_bt']:.1f} kA")
         # Sezionatore di terra BT obbligatorio
         if r['potenza_trasf'] >= 630:
                             st.warning("⚠️ **Sezionatore di terra BT obbligatorio** (≥630 kVA)")
@@ -2647,8 +3012,8 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
             st.info("ℹ️ **Sezionatore di terra BT non obbligatorio** (<630 kVA)")        
 
             # Mostra note specifiche per Ucc 8%
-        if 'note_ucc8' in r['prot_bt']:
-            st.info(f"{r['prot_bt']['note_ucc8']}")
+        if 'note_ucc8' in prot_bt:
+            st.info(f"{prot_bt['note_ucc8']}")
         
         st.markdown("### Verifiche Termiche Cavi")
         st.info(f"**MT:** {r['verifica_termica_mt']['verifica']}")
@@ -2660,14 +3025,7 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
     st.markdown("## Selettività Protezioni - Ucc 8%")
     
     sel = r['selettivita']
-    valutazione = sel['valutazione_complessiva']
-    
-    if "ECCELLENTE" in valutazione or "BUONA" in valutazione:
-        st.success(f"{valutazione}")
-    elif "ACCETTABILE" in valutazione:
-        st.warning(f"{valutazione}")
-    else:
-        st.error(f"{valutazione}")
+    _RENDER_VALUTAZIONE[sel['livello_valutazione']](sel['valutazione_complessiva'])
     
     col_sel1, col_sel2, col_sel3 = st.columns(3)
     
@@ -2683,10 +3041,14 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
     # Tabella risultati selettività
     if sel['risultati_selettivita']:
         st.markdown("**Risultati Selettività:**")
-        df_sel = pd.DataFrame(sel['risultati_selettivita'][:8])  # Primi 8 risultati
-        df_sel_display = df_sel[['corrente_test_kA', 'tempo_bt_s', 'tempo_mt_s', 'selettivita']].copy()
-        df_sel_display.columns = ['I test (kA)', 'Tempo BT (s)', 'Tempo MT (s)', 'Selettività']
-        st.dataframe(df_sel_display, hide_index=True)
+        righe_sel = sel['risultati_selettivita'][:8]  # Primi 8 risultati
+        df_sel = pd.DataFrame({
+            'I test (kA)': [riga['corrente_test_kA'] for riga in righe_sel],
+            'Tempo BT (s)': [riga['tempo_bt_s'] for riga in righe_sel],
+            'Tempo MT (s)': [riga['tempo_mt_s'] for riga in righe_sel],
+            'Selettività': pd.Categorical([riga['selettivita'] for riga in righe_sel])
+        })
+        st.dataframe(df_sel, hide_index=True)
     
     st.markdown("---")
     
@@ -2697,108 +3059,43 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
 
     # Mostra la formula di calcolo
     st.info(f"""
-    **Formula CEI 11-1:** {terra['metodo_calcolo']}
-    - Linea aerea: {terra['lunghezza_linea_aerea_km']} km
-    - Linea cavo: {terra['lunghezza_linea_cavo_km']} km  
-    - Tensione rete: {terra['tensione_rete_kv']} kV
-    - **Corrente di guasto calcolata: {terra['corrente_guasto_effettiva']:.1f} A**
+    **Formula CEI 11-1:** {terra.metodo_calcolo}
+    - Linea aerea: {terra.lunghezza_linea_aerea_km} km
+    - Linea cavo: {terra.lunghezza_linea_cavo_km} km  
+    - Tensione rete: {terra.tensione_rete_kv} kV
+    - **Corrente di guasto calcolata: {terra.corrente_guasto_effettiva:.1f} A**
     """)
 
+    df_corrente, df_disp, df_sicur, df_cond = tabelle_impianto_terra(terra)
+
     col_terra1, col_terra2 = st.columns(2)
 
     with col_terra1:
         st.markdown("### ⚡ Calcolo Corrente di Guasto")
-        df_corrente = pd.DataFrame({
-            "Parametro": [
-                "Corrente CEI 11-1",
-                "Corrente effettiva",
-                "Metodo calcolo",
-                "Tempo eliminazione"
-            ],
-            "Valore": [
-                f"{terra['corrente_guasto_cei']:.1f} A",
-                f"{terra['corrente_guasto_effettiva']:.1f} A",
-                "CEI 11-1",
-                "0.5 s"
-            ]
-        })
         st.dataframe(df_corrente, hide_index=True)
         
         st.markdown("### 🏗️ Dimensioni Dispersore")
-        df_disp = pd.DataFrame({
-            "Parametro": [
-                "Dimensioni cabina",
-                "Anello perimetrale", 
-                "N° picchetti",
-                "Resistenza totale"
-            ],
-            "Valore": [
-                terra['dimensioni_cabina'],
-                f"{terra['sezione_anello']:.0f} mm²",
-                f"{terra['n_picchetti']} × {terra['lunghezza_picchetti']}m",
-                f"{terra['resistenza_totale']:.2f} Ω"
-            ]
-        })
         st.dataframe(df_disp, hide_index=True)
         
         # Indicatore resistenza
-        if terra['resistenza_totale'] <= 1.0:
-            st.success(f"✅ **Resistenza OK: {terra['resistenza_totale']:.2f}Ω ≤ 1Ω**")
+        if terra.resistenza_totale <= 1.0:
+            st.success(f"✅ **Resistenza OK: {terra.resistenza_totale:.2f}Ω ≤ 1Ω**")
         else:
-            st.error(f"❌ **Resistenza ELEVATA: {terra['resistenza_totale']:.2f}Ω > 1Ω**")
+            st.error(f"❌ **Resistenza ELEVATA: {terra.resistenza_totale:.2f}Ω > 1Ω**")
 
     with col_terra2:
         st.markdown("### 🛡️ Verifiche di Sicurezza")
-        df_sicur = pd.DataFrame({
-            "Verifica": [
-                "Resistenza terra",
-                "Tensione passo", 
-                "Tensione contatto",
-                "Tensione terra"
-            ],
-            "Valore Effettivo": [
-                f"{terra['resistenza_totale']:.2f} Ω",
-                f"{terra['tensione_passo_effettiva']:.1f} V",
-                f"{terra['tensione_contatto_effettiva']:.1f} V",
-                f"{terra['tensione_terra']:.1f} V"
-            ],
-            "Limite": [
-                "≤ 1.0 Ω",
-                "≤ 50 V",
-                "≤ 25 V", 
-                "N/A"
-            ],
-            "Esito": [
-                terra['verifica_resistenza'],
-                terra['verifica_passo'],
-                terra['verifica_contatto'],
-                "---"
-            ]
-        })
         st.dataframe(df_sicur, hide_index=True)
         
         st.markdown("### 📏 Sezioni Conduttori")
-        df_cond = pd.DataFrame({
-            "Conduttore": [
-                "Anello principale",
-                "PE principale",
-                "PE masse"
-            ],
-            "Sezione": [
-                f"{terra['sezione_anello']:.0f} mm²",
-                f"{terra['sezione_pe_principale']:.0f} mm²",
-                f"{terra['sezione_pe_masse']:.0f} mm²"
-            ]
-        })
         st.dataframe(df_cond, hide_index=True)
 
     # Note tecniche dettagliate
     st.markdown("**📋 Note Tecniche Dettagliate:**")
-    for i, nota in enumerate(terra['note'], 1):
-        st.write(f"{i}. {nota}")
+    st.markdown("\n".join(f"{i}. {nota}" for i, nota in enumerate(terra.note, 1)))
 
     # Alerting per situazioni critiche
-    if terra['resistenza_totale'] > 1.0:
+    if terra.resistenza_totale > 1.0:
         st.error("""
         ⚠️ **ATTENZIONE:** Resistenza di terra superiore al limite!
         
@@ -2809,7 +3106,7 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
         - Verifica connessioni equipotenziali
         """)
 
-    if terra['protezione_catodica_richiesta']:
+    if terra.protezione_catodica_richiesta:
         st.warning("""
         ⚠️ **CONSIGLIO:** Terreno con alta resistività - valutare protezione catodica
         """)
@@ -2848,9 +3145,10 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
 
     # Distanze pratiche
     st.markdown("### 🏠 Compatibilità Urbanistica")
-    st.write(f"• **Abitazioni:** OK se distanti ≥{campi['dpa_massima']:.1f}m")
-    st.write(f"• **Scuole/Asili:** OK se distanti ≥{max(campi['dpa_massima']+3, 5):.0f}m") 
-    st.write(f"• **Ospedali/RSA:** OK se distanti ≥{max(campi['dpa_massima']+5, 10):.0f}m")
+    st.markdown(
+        f"• **Abitazioni:** OK se distanti ≥{campi['dpa_massima']:.1f}m  \n"
+        f"• **Scuole/Asili:** OK se distanti ≥{max(campi['dpa_massima']+3, 5):.0f}m  \n"
+        f"• **Ospedali/RSA:** OK se distanti ≥{max(campi['dpa_massima']+5, 10):.0f}m")
     st.markdown("---")
     
     # =================== SEZIONE SUMMARY ESECUTIVO ===================
@@ -2860,30 +3158,24 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
     
     with col_sum1:
         st.markdown("### Analisi Economica")
-        rec = r['raccomandazioni']['soluzione_raccomandata']
-        alt = r['raccomandazioni']['soluzione_alternativa']
+        alt = raccomandazioni['soluzione_alternativa']
+        minima = raccomandazioni['soluzione_minima']
         
         df_economic = pd.DataFrame({
-            "Soluzione": ["Ucc 8% + BT Sel", "87T Digitale", "Solo BT Sel"],
-            "CAPEX": [rec['costo_indicativo'], alt['costo_indicativo'], r['raccomandazioni']['soluzione_minima']['costo_indicativo']],
-            "TCO 25 anni": [rec['tco_25_anni'], alt['tco_25_anni'], r['raccomandazioni']['soluzione_minima']['tco_25_anni']],
-            "Raccomandazione": ["🏆 PRIMA SCELTA", "Casi speciali", "Budget limitato"]
+            "Soluzione": _SOLUZIONI_ECONOMICHE,
+            "CAPEX": [rec['costo_indicativo'], alt['costo_indicativo'], minima['costo_indicativo']],
+            "TCO 25 anni": [rec['tco_25_anni'], alt['tco_25_anni'], minima['tco_25_anni']],
+            "Raccomandazione": _GIUDIZI_ECONOMICI
         })
         st.dataframe(df_economic, hide_index=True)
         
     with col_sum2:
         st.markdown("### Prestazioni Chiave")
         
-        finale = r['raccomandazioni']['raccomandazione_finale']
+        finale = raccomandazioni['raccomandazione_finale']
         
         key_metrics = pd.DataFrame({
-            "Parametro": [
-                "Trasformatore",
-                "Selettività attesa",
-                "Affidabilità",
-                "Manutenzione",
-                "Vita utile"
-            ],
+            "Parametro": _PARAMETRI_PRESTAZIONI,
             "Valore": [
                 f"{r['potenza_trasf']}kVA Ucc 8%",
                 f"{r['selettivita']['percentuale_successo']:.0f}% (migliorata)",
@@ -2897,35 +3189,8 @@ if st.session_state.calcoli_effettuati and st.session_state.risultati_completi:
     # =================== PULSANTE PDF CON RACCOMANDAZIONI ===================
     st.markdown("## 📄 Generazione Report con Raccomandazioni")
     
-    if st.button("📄 GENERA REPORT PDF CON RACCOMANDAZIONI", type="primary", use_container_width=True):
-        try:
-            p = r['parametri_input']
-            
-            pdf_buffer = genera_pdf_report_con_raccomandazioni(
-                p['potenza_carichi'], p['f_contemporaneita'], p['cos_phi'], p['margine'],
-                r['potenza_trasf'], r['potenza_necessaria'], r['I_mt'], r['I_bt'], r['Icc_bt'],
-                r['prot_mt'], r['prot_bt'], r['cavi'], r['ventilazione'], r['rendimento'], 
-                calc, r['isolamento'], r['illuminazione'], r['cadute_tensione'], 
-                r['scaricatori'], r['antincendio'], r['regime_neutro'], 
-                r['verifiche_costruttive'], r['impianto_terra'], r['raccomandazioni']
-            )
-            
-            filename = f"Cabina_MT_BT_{r['potenza_trasf']}kVA_Ucc8_Raccomandazioni_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
-            
-            st.download_button(
-                label="⬇️ Scarica Report PDF con Raccomandazioni",
-                data=pdf_buffer,
-                file_name=filename,
-                mime="application/pdf",
-                use_container_width=True
-            )
-            
-            st.success("✅ Report PDF con raccomandazioni ingegneristiche generato con successo!")
-            
-        except Exception as e:
-            st.error(f"❌ Errore nella generazione del PDF: {str(e)}")
+    sezione_report_pdf(r, st.session_state.input_calcolo, st.session_state.data_calcolo)
 
-    
     # Messaggio finale del progettista
     st.info(f"""
     🎯 **CONCLUSIONE DEL PROGETTISTA:**